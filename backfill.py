@@ -0,0 +1,232 @@
+"""
+Resumable backfill of the weekly Billboard Hot 100 archive (1958 onwards).
+
+    python cli.py backfill --out data/hot-100
+    python cli.py backfill --out data/hot-100 --start 2000-01-01 --end 2000-12-31
+
+Weeks are fetched with bounded, per-host throttled concurrency through the
+shared transport (which retries 429/5xx with backoff) and parsed in a process
+pool. Each finished week is written straight away and recorded in
+`checkpoint.json`, so a crashed or interrupted run picks up where it stopped.
+At the end, each year's weekly files are compacted into one Parquet file
+(`hot-100-YYYY.parquet`).
+"""
+import json
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, wait, FIRST_COMPLETED
+from datetime import date, timedelta
+
+import requests
+
+import metrics
+from parsing import xpath_has_class
+from scraper import HEADERS, HostThrottle
+from transport import get_transport
+
+FIRST_CHART = date(1958, 8, 4)
+CHART_URL = 'https://www.billboard.com/charts/{chart}/{week}/'
+
+# Weeks fetched or parsed at a time, per fetch worker; more are submitted as they finish
+IN_FLIGHT_PER_WORKER = 4
+
+COLUMNS = ['chart_date', 'week', 'rank', 'title', 'artist', 'last_week', 'peak_position', 'weeks_on_chart']
+_STAT = re.compile(r'^(\d+|-)$')
+
+
+def week_dates(start=FIRST_CHART, end=None):
+    """Every chart week from `start` to `end` (default: today), one week apart."""
+    end = end or date.today()
+    week = start
+    while week <= end:
+        yield week
+        week += timedelta(days=7)
+
+
+def parse_weekly_chart(html_content, week):
+    """
+    Parse one weekly chart page into rows.
+
+    Runs in a worker process, so it takes and returns plain picklable values.
+
+    Returns:
+        A list of dictionaries with the fields in COLUMNS.
+    """
+    import lxml.etree
+    import lxml.html
+
+    try:
+        document = lxml.html.document_fromstring(html_content)
+    except lxml.etree.ParserError:
+        # An empty body (or one with nothing but comments): no rows, so the week is retried
+        return []
+    picker = document.xpath("//*[@id='chart-date-picker']/@data-date")
+    chart_date = picker[0] if picker else week
+
+    rows = []
+    for row in document.xpath(f"//ul[{xpath_has_class('o-chart-results-list-row')}]"):
+        labels = row.xpath(f".//span[{xpath_has_class('c-label')}]")
+        titles = row.xpath(".//h3[@id='title-of-a-story']")
+        if not labels or not titles:
+            continue
+
+        title = titles[0]
+        artist = title.getnext()
+        artist_text = artist.text_content().strip() if artist is not None and artist.tag == 'span' else ''
+
+        # Last week / peak / weeks on chart are the last three numeric labels after the artist
+        following = labels[labels.index(artist) + 1:] if artist in labels else labels[1:]
+        stats = [label.text_content().strip() for label in following]
+        stats = [stat for stat in stats if _STAT.match(stat)][-3:]
+        stats = [''] * (3 - len(stats)) + stats
+
+        rows.append({
+            'chart_date': chart_date,
+            'week': week,
+            'rank': labels[0].text_content().strip(),
+            'title': title.text_content().strip(),
+            'artist': artist_text,
+            'last_week': stats[0],
+            'peak_position': stats[1],
+            'weeks_on_chart': stats[2],
+        })
+    return rows
+
+
+def fetch_week(url, throttle):
+    """Fetch one chart page (the transport retries with backoff). Returns None if it keeps failing."""
+    try:
+        with throttle.slot(url):
+            response = get_transport().get(url, headers=HEADERS)
+    except requests.exceptions.RequestException as e:
+        print(f"{url}: {e}")
+        return None
+    if response.status_code != 200:
+        print(f"{url}: status {response.status_code}")
+        return None
+    return response.content
+
+
+class Checkpoint:
+    """The set of weeks already written, saved atomically after every week."""
+
+    def __init__(self, path):
+        self.path = path
+        self.done = set()
+        if os.path.exists(path):
+            with open(path) as f:
+                self.done = set(json.load(f)['done'])
+
+    def add(self, week):
+        self.done.add(week)
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, 'w') as f:
+            json.dump({'done': sorted(self.done)}, f)
+        os.replace(temp_path, self.path)
+
+
+def _typed_frame(rows):
+    import pandas as pd
+
+    frame = pd.DataFrame(rows, columns=COLUMNS)
+    for column in ['rank', 'last_week', 'peak_position', 'weeks_on_chart']:
+        frame[column] = pd.to_numeric(frame[column], errors='coerce').astype('Int16')
+    return frame
+
+
+def write_week(out_dir, week, rows):
+    weeks_dir = os.path.join(out_dir, 'weeks')
+    os.makedirs(weeks_dir, exist_ok=True)
+    path = os.path.join(weeks_dir, f"{week}.parquet")
+    _typed_frame(rows).to_parquet(f"{path}.tmp", index=False)
+    os.replace(f"{path}.tmp", path)
+
+
+def compact(out_dir, chart='hot-100'):
+    """Merge the per-week files into one Parquet file per year, then remove them."""
+    import pandas as pd
+
+    weeks_dir = os.path.join(out_dir, 'weeks')
+    if not os.path.isdir(weeks_dir):
+        return
+
+    by_year = {}
+    for name in sorted(os.listdir(weeks_dir)):
+        if name.endswith('.parquet'):
+            by_year.setdefault(name[:4], []).append(os.path.join(weeks_dir, name))
+
+    for year, paths in by_year.items():
+        year_path = os.path.join(out_dir, f"{chart}-{year}.parquet")
+        frames = [pd.read_parquet(path) for path in paths]
+        if os.path.exists(year_path):
+            frames.insert(0, pd.read_parquet(year_path))
+        combined = pd.concat(frames, ignore_index=True)
+        combined = combined.drop_duplicates(subset=['week', 'rank'], keep='last').sort_values(['week', 'rank'])
+        combined.to_parquet(f"{year_path}.tmp", index=False)
+        os.replace(f"{year_path}.tmp", year_path)
+        for path in paths:
+            os.remove(path)
+
+
+@metrics.measured()
+def backfill(out_dir, chart='hot-100', start=FIRST_CHART, end=None, fetch_workers=4, per_host=2, delay=1.0,
+             processes=None):
+    """
+    Fetch and store every weekly chart between `start` and `end` not already in the checkpoint.
+
+    Returns:
+        The list of weeks that could not be fetched this run (they are retried next run).
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    checkpoint = Checkpoint(os.path.join(out_dir, 'checkpoint.json'))
+    weeks = [week.isoformat() for week in week_dates(start, end) if week.isoformat() not in checkpoint.done]
+    print(f"{len(weeks)} weeks to fetch ({len(checkpoint.done)} already done)")
+
+    throttle = HostThrottle(per_host=per_host, delay=delay)
+    fetch = metrics.propagate(fetch_week)
+    failed = []
+    remaining = iter(weeks)
+    in_flight = max(fetch_workers, 1) * IN_FLIGHT_PER_WORKER
+
+    with ThreadPoolExecutor(max_workers=fetch_workers) as fetchers, ProcessPoolExecutor(max_workers=processes) as parsers:
+        fetching = {}
+        parsing = {}
+
+        def submit_fetches():
+            while len(fetching) + len(parsing) < in_flight:
+                week = next(remaining, None)
+                if week is None:
+                    return
+                fetching[fetchers.submit(fetch, CHART_URL.format(chart=chart, week=week), throttle)] = week
+
+        try:
+            submit_fetches()
+            while fetching or parsing:
+                finished, _ = wait(list(fetching) + list(parsing), return_when=FIRST_COMPLETED)
+                for future in finished:
+                    if future in fetching:
+                        week = fetching.pop(future)
+                        html_content = future.result()
+                        if html_content is None:
+                            failed.append(week)
+                        else:
+                            parsing[parsers.submit(parse_weekly_chart, html_content, week)] = week
+                    else:
+                        week = parsing.pop(future)
+                        rows = future.result()
+                        if not rows:
+                            print(f"{week}: no rows found")
+                            failed.append(week)
+                            continue
+                        write_week(out_dir, week, rows)
+                        checkpoint.add(week)
+                submit_fetches()
+        finally:
+            # On an error or Ctrl-C, drop the queued weeks instead of fetching them for nothing
+            fetchers.shutdown(cancel_futures=True)
+            parsers.shutdown(cancel_futures=True)
+
+    compact(out_dir, chart)
+    print(f"Backfill finished: {len(checkpoint.done)} weeks stored, {len(failed)} failed")
+    print(get_transport().summary())
+    return failed
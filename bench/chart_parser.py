@@ -0,0 +1,160 @@
+"""
+Checks that the lxml and BeautifulSoup chart-history parsers agree, and times both.
+
+Run from the repository root:
+
+    python -m bench.chart_parser                      # saved corpus, plus synthetic pages
+    python -m bench.chart_parser saved/drake.html ... # specific saved Billboard pages
+    python -m bench.chart_parser --record drake:hot-100 taylor-swift:billboard-200
+                                                      # save chart-history pages into the corpus
+
+The corpus is committed in bench/corpus/charts, one page per artist and chart,
+minus scripts and embeds (see bench/sanitize.py). Exits non-zero if the
+corpus is empty or the two parsers produce different rows for any page.
+"""
+import argparse
+import glob
+import os
+import random
+import sys
+import time
+
+from bench.sanitize import sanitize_html
+from scraper import parse_chart_history
+
+CORPUS_DIR = os.path.join(os.path.dirname(__file__), 'corpus', 'charts')
+
+ROW_TEMPLATE = """
+<div class="o-chart-results-list-row // lrv-u-flex">
+  <div class="o-chart-results-list__item // lrv-u-flex-grow-1">
+    <h3 id="title-of-a-story" class="c-title  a-no-trucate a-font-primary-bold-s">
+      {title}
+    </h3>
+    <span class="c-label  a-no-trucate a-font-primary-s">{artist}</span>
+  </div>
+  <div class="o-chart-results-list__item">
+    <span class="c-label artist-chart-row-debut-date">{debut_date}</span>
+  </div>
+  <div class="o-chart-results-list__item">
+    <span class="c-label artist-chart-row-peak-pos">{peak_pos}</span>
+    <span class="c-label artist-chart-row-peak-week">{peak_week}</span>
+  </div>
+  <div class="o-chart-results-list__item">
+    <span class="c-label artist-chart-row-peak-date"><a href="#">{peak_date}</a></span>
+  </div>
+  <div class="o-chart-results-list__item">
+    <span class="c-label artist-chart-row-week-on-chart">{weeks}</span>
+  </div>
+</div>
+"""
+
+# A row with too few cells, which both parsers report as an empty dict
+SHORT_ROW = """
+<div class="o-chart-results-list-row">
+  <div class="o-chart-results-list__item"><h3 id="title-of-a-story" class="c-title">Short Row</h3></div>
+</div>
+"""
+
+PAGE_TEMPLATE = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>Chart History</title></head>
+<body>
+<div class="artist-chart-history-container">
+  <div class="artist-chart-history-items">
+  {rows}
+  </div>
+</div>
+</body></html>
+"""
+
+
+def synthetic_page(songs, seed=0):
+    """Build a chart-history page shaped like Billboard's with `songs` rows."""
+    rng = random.Random(seed)
+    rows = []
+    for i in range(songs):
+        peak = rng.randint(1, 100)
+        rows.append(ROW_TEMPLATE.format(
+            title=f"Song Number {i} – Café Remix",
+            artist=rng.choice(["Drake", "Drake Featuring Future", "Beyoncé & Drake"]),
+            debut_date=f"{rng.randint(1, 12):02d}.{rng.randint(1, 28):02d}.{rng.randint(2009, 2025)}",
+            peak_pos=peak,
+            # Some rows have no peak week, like songs that peaked on debut
+            peak_week=f"{rng.randint(1, 4)} wks" if rng.random() < 0.7 else "",
+            peak_date=f"{rng.randint(1, 12):02d}.{rng.randint(1, 28):02d}.{rng.randint(2009, 2025)}",
+            weeks=rng.randint(1, 80),
+        ))
+        if i % 97 == 0:
+            rows.append(SHORT_ROW)
+    return PAGE_TEMPLATE.format(rows="".join(rows)).encode("utf-8")
+
+
+def time_parser(page, parser, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        rows = parse_chart_history(page, parser=parser)
+    return (time.perf_counter() - start) / repeat, rows
+
+
+def record(directory, targets):
+    """Save the chart-history page of each 'artist:chart' target, sanitized, into `directory`."""
+    from http_cache import cached_get
+    from scraper import HEADERS, chart_history_url, parse_targets
+
+    os.makedirs(directory, exist_ok=True)
+    for artist, chart in parse_targets(targets):
+        response = cached_get(chart_history_url(artist, chart), headers=HEADERS)
+        response.raise_for_status()
+        path = os.path.join(directory, f"{artist}-{chart}.html")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(sanitize_html(response.text))
+        print(f"Saved {path}")
+
+
+def read_page(path):
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare and time the chart-history parsers.")
+    parser.add_argument("paths", nargs="*", help="saved chart-history pages")
+    parser.add_argument("--record", nargs="+", metavar="artist:chart",
+                        help=f"save these chart-history pages into {CORPUS_DIR}")
+    args = parser.parse_args(argv)
+
+    if args.record:
+        record(CORPUS_DIR, args.record)
+        return 0
+
+    if args.paths:
+        pages = [(path, read_page(path)) for path in args.paths]
+    else:
+        paths = sorted(glob.glob(os.path.join(CORPUS_DIR, "*.html")))
+        if not paths:
+            print(f"No saved pages in {CORPUS_DIR}; record some with --record")
+            return 1
+        pages = [(os.path.relpath(path), read_page(path)) for path in paths]
+        pages += [(f"synthetic {n} songs", synthetic_page(n)) for n in (50, 300, 1000)]
+
+    mismatches = 0
+    for name, page in pages:
+        repeat = 5
+        bs4_time, bs4_rows = time_parser(page, "bs4", repeat)
+        lxml_time, lxml_rows = time_parser(page, "lxml", repeat)
+
+        if bs4_rows != lxml_rows:
+            mismatches += 1
+            print(f"MISMATCH {name}: bs4 gave {len(bs4_rows)} rows, lxml gave {len(lxml_rows)}")
+            for bs4_row, lxml_row in zip(bs4_rows, lxml_rows):
+                if bs4_row != lxml_row:
+                    print(f"  first difference:\n    bs4:  {bs4_row}\n    lxml: {lxml_row}")
+                    break
+
+        print(f"{name}: {len(bs4_rows)} rows, bs4 {bs4_time * 1000:.1f} ms, "
+              f"lxml {lxml_time * 1000:.1f} ms ({bs4_time / lxml_time:.1f}x)")
+
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,305 @@
+"""
+Fixtures for the replay benchmark: every response the two jobs read.
+
+    Billboard chart-history HTML      www.billboard.com
+    Pitcher List listing + post JSON  pitcherlist.com
+    teamrankings stat pages           www.teamrankings.com
+    FanGraphs team splits JSON        www.fangraphs.com
+    ESPN free agents + league activity lm-api-reads.fantasy.espn.com
+    Eno sheet values                  (Google Sheets, stored as JSON)
+
+synthetic(scale) builds them at realistic sizes times `scale`; record()
+saves live responses into a directory (needs network access and the usual
+credentials) and load() reads them back.
+"""
+import json
+import os
+import random
+import re
+import time
+
+from bench.chart_parser import synthetic_page
+from bench.streamer_parser import PLAYER_TEMPLATES
+from fbb import opponents, pitcherlist
+from fbb.espn_pool import ACTIVITY_PAGE_SIZE, MAX_ACTIVITY_PAGES, parse_free_agents
+from fbb.pitchers import SOURCE_SHEET_ID, SOURCE_SHEET_NAME, parse_streamer_rankings, season_id
+from scraper import parse_chart_history
+
+# Realistic sizes at scale 1
+BASE_SIZES = {'songs': 300, 'players': 40, 'espn_pool': 400, 'eno_rows': 500}
+
+CHART = ('drake', 'hot-100')
+CHART_PATH = '/artist/drake/chart-history/hot-100/'
+POSTS_PATH = '/wp-json/wp/v2/posts'
+FANGRAPHS_PATH = '/api/leaders/major-league/data'
+ESPN_HOST = 'lm-api-reads.fantasy.espn.com'
+# Any league and season; '/communication/' is the league's activity
+ESPN_LEAGUE_PATH = re.compile(r'/apis/v3/games/flb/seasons/\d+/segments/0/leagues/[^/]+(/communication/)?$')
+TIERS = ['Auto-Starts', 'Probably Starts', 'Questionable Starts', 'Do Not Starts']
+SYLLABLES = ['ka', 'lo', 'mi', 'ran', 'de', 'vi', 'to', 'sa', 'ber', 'ri', 'os', 'gel', 'la', 'no', 'che', 'wes']
+FIRST_NAMES = ['Max', 'José', 'Logan', 'Shōta', 'Zack', 'Tyler', 'Luis', 'Hunter', 'Spencer', 'Cristopher']
+
+
+class Fixtures:
+    """
+    Responses keyed by (host, path, variant), the ESPN league, and the Eno sheet.
+
+    `variant` is the FanGraphs split code for FanGraphs pages and None otherwise.
+    `espn_players` are ESPN player entries (as in a kona_player_info response)
+    and `espn_activity` the league's transaction topics, newest first.
+    """
+
+    def __init__(self, routes, espn_players, espn_activity, eno_values, sizes):
+        self.routes = routes
+        self.espn_players = espn_players
+        self.espn_activity = espn_activity
+        self.eno_values = eno_values
+        self.sizes = sizes
+        self._free_agents = None
+
+    def resolve(self, host, path, query, headers=None):
+        if host == ESPN_HOST:
+            return self._espn(path, headers or {})
+        return self.routes.get((host, path, query.get('month'))) or self.routes.get((host, path, None))
+
+    def _espn(self, path, headers):
+        league = ESPN_LEAGUE_PATH.match(path)
+        if league is None:
+            return None
+        fantasy_filter = json.loads(headers.get('x-fantasy-filter') or '{}')
+
+        if league.group(1):
+            topics_filter = fantasy_filter.get('topics', {})
+            offset = topics_filter.get('offset', 0)
+            topics = self.espn_activity[offset:offset + topics_filter.get('limit', len(self.espn_activity))]
+            # Served as if the latest transaction had just happened
+            shift = int(time.time() * 1000) - max((topic['date'] for topic in self.espn_activity), default=0)
+            return _json({'topics': [dict(topic, date=topic['date'] + shift) for topic in topics]})
+
+        players_filter = fantasy_filter.get('players', {})
+        players = self.espn_players
+        if 'filterIds' in players_filter:
+            ids = set(players_filter['filterIds']['value'])
+            players = [entry for entry in players if entry['id'] in ids]
+        return _json({'players': players[:players_filter.get('limit', len(players))]})
+
+    def free_agent_players(self):
+        """Every pitcher in the ESPN pool, parsed as the pipeline parses a fetch (and only once)."""
+        if self._free_agents is None:
+            self._free_agents = parse_free_agents(self.espn_players, season_id)
+        return self._free_agents
+
+    def spreadsheets(self):
+        return {SOURCE_SHEET_ID: {SOURCE_SHEET_NAME: self.eno_values}}
+
+    @property
+    def chart_html(self):
+        return self.routes[('www.billboard.com', CHART_PATH, None)][1]
+
+    @property
+    def post(self):
+        listing = json.loads(self.routes[('pitcherlist.com', POSTS_PATH, None)][1])
+        return json.loads(self.routes[('pitcherlist.com', f"{POSTS_PATH}/{listing[0]['id']}", None)][1])
+
+
+def _json(value):
+    return 'application/json', json.dumps(value).encode('utf-8')
+
+
+def _html(value):
+    return 'text/html; charset=utf-8', value if isinstance(value, bytes) else value.encode('utf-8')
+
+
+def espn_player(player_id, name, pro_team_id):
+    """A free-agent starting pitcher as ESPN lists one (lineup slots P, SP, BE and IL)."""
+    return {'id': player_id, 'onTeamId': 0, 'status': 'FREEAGENT',
+            'player': {'id': player_id, 'fullName': name, 'defaultPositionId': 1, 'proTeamId': pro_team_id,
+                       'eligibleSlots': [13, 14, 16, 17]}}
+
+
+def espn_activity(dropped_ids, added_ids):
+    """Transaction topics, newest first and 100 ms apart: each player dropped, or added by a team."""
+    messages = [(178, player_id) for player_id in added_ids] + [(179, player_id) for player_id in dropped_ids]
+    return [{'date': 1_750_000_000_000 - index * 100, 'messages': [{'messageTypeId': type_id, 'targetId': player_id}]}
+            for index, (type_id, player_id) in enumerate(messages)]
+
+
+def player_names(count, rng):
+    """`count` distinct, plausible-looking player names (up to about 700,000)."""
+    names = set()
+    while len(names) < count:
+        surname = ''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))).capitalize()
+        names.add(f"{rng.choice(FIRST_NAMES)} {surname}")
+    return sorted(names, key=lambda name: rng.random())
+
+
+def _variant(name, rng):
+    """A spelling another source might use for the same player."""
+    roll = rng.random()
+    if roll < 0.7:
+        return name
+    if roll < 0.85:
+        return name.replace('é', 'e').replace('ō', 'o') + ' Jr.'
+    # One dropped letter, which only fuzzy matching recovers
+    position = rng.randrange(1, len(name))
+    return name[:position] + name[position + 1:]
+
+
+def streamer_post_html(names, rng):
+    teams = list(opponents.TEAMS) + ['CHW', 'KC', 'SD']
+    parts = ['<p>Welcome back.</p>', '<p>Here are the <strong>Starting Pitcher Streamer Rankings</strong>.</p>']
+    per_tier = -(-len(names) // len(TIERS))
+    for index, name in enumerate(names):
+        if index % per_tier == 0:
+            parts.append(f'<p><strong>{TIERS[index // per_tier]}</strong></p>')
+        parts.append(rng.choice(PLAYER_TEMPLATES[:3]).format(
+            slug=name.lower().replace(' ', '-'), name=name, team=rng.choice(teams),
+            where=rng.choice(['vs.', '@']), opponent=rng.choice(teams),
+            blurb="Solid strikeout upside &amp; a friendly park.",
+        ))
+    return ''.join(parts)
+
+
+def teamrankings_page(rng):
+    names = [names[0] for names in opponents.TEAMS.values()]
+    values = sorted(((round(rng.uniform(3, 6), 3), name) for name in names), reverse=True)
+    rows = ''.join(
+        f"<tr><td>{rank}</td><td><a>{name}</a></td><td>{value}</td><td>{value}</td><td>{value}</td>"
+        f"<td>{round(value * rng.uniform(0.9, 1.1), 3)}</td><td>{round(value * rng.uniform(0.9, 1.1), 3)}</td>"
+        f"<td>--</td></tr>"
+        for rank, (value, name) in enumerate(values, 1)
+    )
+    return (
+        '<html><body><table class="tr-table datatable scrollable"><thead><tr><th>Rank</th><th>Team</th>'
+        '<th>2025</th><th>Last 3</th><th>Last 1</th><th>Home</th><th>Away</th><th>2024</th></tr></thead>'
+        f'<tbody>{rows}</tbody></table></body></html>'
+    )
+
+
+def fangraphs_payload(rng):
+    abbreviations = [code if code != 'CWS' else 'CHW' for code in opponents.TEAMS]
+    return {'data': [
+        {'Team': f'<a href="#">{code}</a>', 'TeamNameAbb': code, 'K%': rng.uniform(0.18, 0.26),
+         'wOBA': rng.uniform(0.29, 0.34), 'OPS': rng.uniform(0.65, 0.8)}
+        for code in abbreviations
+    ]}
+
+
+def synthetic(scale=1, seed=0):
+    rng = random.Random(seed)
+    sizes = {name: size * scale for name, size in BASE_SIZES.items()}
+
+    pool = player_names(sizes['players'] + sizes['espn_pool'] + sizes['eno_rows'], rng)
+    ranked = pool[:sizes['players']]
+    others = pool[sizes['players']:]
+
+    # About 60% of ranked pitchers are free agents and 80% are in the Eno sheet
+    espn_names = [_variant(name, rng) for name in ranked if rng.random() < 0.6]
+    espn_names += others[:sizes['espn_pool'] - len(espn_names)]
+    espn_players = [espn_player(30000 + index, name, rng.randint(1, 30)) for index, name in enumerate(espn_names)]
+    # Every 50th pool player was just dropped back into it, and as many others were picked up
+    dropped_ids = [entry['id'] for entry in espn_players[::50]]
+    activity = espn_activity(dropped_ids, range(90000, 90000 + len(dropped_ids)))
+
+    eno_names = [_variant(name, rng) for name in ranked if rng.random() < 0.8]
+    eno_names += others[-(sizes['eno_rows'] - len(eno_names)):]
+    header = ['Eno', 'Name', 'Team', 'IP', 'Stuff+', 'Location+', 'Pitching+', 'Blurb']
+    eno_values = [header] + [
+        [str(rank), name, rng.choice(list(opponents.TEAMS)), f"{rng.uniform(20, 120):.1f}",
+         str(rng.randint(80, 130)), str(rng.randint(80, 130)), str(rng.randint(80, 130)), "Good changeup."]
+        for rank, name in enumerate(sorted(eno_names, key=lambda name: rng.random()), 1)
+    ]
+
+    post = {'id': 1001, 'date': '2025-06-03T08:00:00', 'modified': '2025-06-03T09:00:00',
+            'title': {'rendered': 'Starting Pitcher Streamer Rankings: June 3'},
+            'link': 'https://pitcherlist.com/starting-pitcher-streamer-rankings-june-3/',
+            'content': {'rendered': streamer_post_html(ranked, rng)}}
+    listing = [{field: post[field] for field in pitcherlist.LISTING_FIELDS.split(',')}]
+
+    routes = {
+        ('www.billboard.com', CHART_PATH, None): _html(synthetic_page(sizes['songs'], seed)),
+        ('pitcherlist.com', POSTS_PATH, None): _json(listing),
+        ('pitcherlist.com', f"{POSTS_PATH}/{post['id']}", None): _json(post),
+    }
+    for source, page, _, _ in opponents.STATS.values():
+        if source == 'teamrankings':
+            routes[('www.teamrankings.com', f"/mlb/stat/{page}", None)] = _html(teamrankings_page(rng))
+        else:
+            routes[('www.fangraphs.com', FANGRAPHS_PATH, str(page))] = _json(fangraphs_payload(rng))
+
+    return Fixtures(routes, espn_players, activity, eno_values, sizes)
+
+
+def record(directory):
+    """Save live responses for every source into `directory`."""
+    from datetime import date
+    from http_cache import cached_get
+    from scraper import HEADERS, chart_history_url
+    from fbb.espn_pool import LeagueClient
+    from fbb.pitchers import default_league
+    from sheets import read_ranges
+
+    os.makedirs(directory, exist_ok=True)
+
+    def save(name, content):
+        path = os.path.join(directory, name)
+        with open(path, 'wb') as f:
+            f.write(content)
+        print(f"Saved {path} ({len(content) / 1024:.0f} KB)")
+
+    response = cached_get(chart_history_url(*CHART), headers=HEADERS)
+    response.raise_for_status()
+    save('billboard.html', response.content)
+
+    listing = pitcherlist.find_streamer_posts()
+    save('pitcherlist_listing.json', json.dumps(listing).encode('utf-8'))
+    save('pitcherlist_post.json', json.dumps(pitcherlist.fetch_latest_streamer_post(listing[0])).encode('utf-8'))
+
+    season = date.today().year
+    for source, page in sorted({stat[:2] for stat in opponents.STATS.values()}, key=str):
+        response = cached_get(opponents.page_url(source, page, season), headers=opponents.HEADERS)
+        response.raise_for_status()
+        save(f"{source}_{page}.{'html' if source == 'teamrankings' else 'json'}", response.content)
+
+    league = default_league()
+    client = LeagueClient(league.league_id, league.season, league.espn_s2, league.swid)
+    save('espn_players.json', json.dumps(client.player_entries()).encode('utf-8'))
+    activity = []
+    for page in range(MAX_ACTIVITY_PAGES):
+        topics = client.activity(page)
+        activity.extend(topics)
+        if len(topics) < ACTIVITY_PAGE_SIZE:
+            break
+    save('espn_activity.json', json.dumps(activity).encode('utf-8'))
+    save('eno_values.json', json.dumps(read_ranges(SOURCE_SHEET_ID, [SOURCE_SHEET_NAME])[0]).encode('utf-8'))
+
+
+def load(directory):
+    """Read fixtures saved by record()."""
+    def read(name):
+        with open(os.path.join(directory, name), 'rb') as f:
+            return f.read()
+
+    listing = json.loads(read('pitcherlist_listing.json'))
+    post = json.loads(read('pitcherlist_post.json'))
+    routes = {
+        ('www.billboard.com', CHART_PATH, None): _html(read('billboard.html')),
+        ('pitcherlist.com', POSTS_PATH, None): _json(listing[:1] or [post]),
+        ('pitcherlist.com', f"{POSTS_PATH}/{post['id']}", None): _json(post),
+    }
+    for source, page, _, _ in opponents.STATS.values():
+        if source == 'teamrankings':
+            routes[('www.teamrankings.com', f"/mlb/stat/{page}", None)] = _html(read(f"teamrankings_{page}.html"))
+        else:
+            routes[('www.fangraphs.com', FANGRAPHS_PATH, str(page))] = ('application/json', read(f"fangraphs_{page}.json"))
+
+    espn_players = json.loads(read('espn_players.json'))
+    activity = json.loads(read('espn_activity.json'))
+    eno_values = json.loads(read('eno_values.json'))
+    sizes = {
+        'songs': len(parse_chart_history(read('billboard.html'))),
+        'players': len(parse_streamer_rankings(post['content']['rendered'])),
+        'espn_pool': len(espn_players),
+        'eno_rows': len(eno_values) - 1,
+    }
+    return Fixtures(routes, espn_players, activity, eno_values, sizes)
@@ -0,0 +1,74 @@
+"""
+Measures cold-start import time of the CLI and each job, and checks that no
+job loads heavy libraries it does not need.
+
+Run from the repository root:
+
+    python -m bench.import_time            # report only
+    python -m bench.import_time --budget   # also fail if a time budget is exceeded
+
+Exits non-zero if a forbidden module gets imported (or a budget is blown), so
+it can be run in CI to catch startup regressions.
+"""
+import argparse
+import json
+import subprocess
+import sys
+
+HEAVY = ['pandas', 'numpy', 'gspread', 'espn_api', 'oauth2client', 'google', 'bs4', 'lxml', 'rapidfuzz', 'requests']
+
+# What each entry point imports, which heavy modules it may load, and a time budget in ms
+CASES = [
+    ('cli', 'import cli', [], 50),
+    ('cli charts', 'import cli, scraper', ['requests'], 300),
+    ('cli pitchers', 'import cli; from fbb import pitchers', ['pandas', 'numpy', 'rapidfuzz', 'requests'], 1500),
+]
+
+PROBE = """
+import sys, time, json
+start = time.perf_counter()
+{statement}
+elapsed = time.perf_counter() - start
+loaded = sorted({{name.split('.')[0] for name in sys.modules}} & set({heavy!r}))
+print(json.dumps({{'ms': elapsed * 1000, 'loaded': loaded}}))
+"""
+
+
+def measure(statement, repeat):
+    """Import in fresh interpreters and return the best time and the heavy modules loaded."""
+    best = None
+    for _ in range(repeat):
+        output = subprocess.run(
+            [sys.executable, '-c', PROBE.format(statement=statement, heavy=HEAVY)],
+            capture_output=True, text=True, check=True,
+        ).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        if best is None or result['ms'] < best['ms']:
+            best = result
+    return best
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=5, help="fresh interpreters per case (best time is kept)")
+    parser.add_argument('--budget', action='store_true', help="fail when a case exceeds its time budget")
+    args = parser.parse_args(argv)
+
+    failures = 0
+    for name, statement, allowed, budget_ms in CASES:
+        result = measure(statement, args.repeat)
+        unexpected = [module for module in result['loaded'] if module not in allowed]
+        status = 'ok'
+        if unexpected:
+            status = f"FAIL imports {', '.join(unexpected)}"
+            failures += 1
+        elif args.budget and result['ms'] > budget_ms:
+            status = f"FAIL over {budget_ms} ms budget"
+            failures += 1
+        print(f"{name:14} {result['ms']:8.1f} ms  {status}")
+
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
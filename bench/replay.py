@@ -0,0 +1,187 @@
+"""
+Offline replay benchmark for both jobs.
+
+Every HTTP request is answered by a local stand-in server from fixtures, and
+Google Sheets by an in-memory gspread client, so the real fetch, parse, match
+and export code runs without touching a live site. Each stage reports wall
+time, peak Python memory (tracemalloc) and throughput.
+
+Run from the repository root:
+
+    python -m bench.replay                          # synthetic fixtures at 1x, 10x and 100x
+    python -m bench.replay --scales 1 10
+    python -m bench.replay --fixtures bench/recorded/live    # recorded fixtures (1x only)
+    python -m bench.replay --record bench/recorded/live      # record live fixtures (needs network and credentials)
+
+Recorded fixtures are not committed (bench/recorded/ is ignored).
+"""
+import argparse
+import contextlib
+import io
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import pandas as pd
+
+import http_cache
+from bench import fixtures as fixture_sets
+from bench.standins import FakeClient, StandInServer, install_sheets, install_transport
+from fbb import pitchers
+from fbb.espn_pool import POOL_SIZE
+from fbb.identity import IdentityStore
+from fbb.opponents import opponent_rank_matrix
+from scraper import output_to_google_sheets, parse_chart_history
+
+TARGET_SHEET_ID = 'replay-target'
+
+
+class Replay:
+    """Points every source at the fixtures, with fresh local state for each run."""
+
+    def __init__(self, fixtures, server):
+        self.fixtures = fixtures
+        self.server = server
+        self.workdir = None
+        self.client = None
+
+    def reset(self):
+        if self.workdir:
+            shutil.rmtree(self.workdir, ignore_errors=True)
+        self.workdir = tempfile.mkdtemp(prefix='replay-')
+        for name, value in [('PLAYER_ID_DB', 'ids.sqlite'), ('HISTORY_DB', 'history.sqlite'),
+                            ('PITCHERLIST_STATE', 'streamer_post.json'), ('ESPN_POOL_DB', 'espn_pool.sqlite')]:
+            os.environ[name] = os.path.join(self.workdir, value)
+
+        install_transport(self.server)
+        http_cache._cache = http_cache.HTTPCache(os.path.join(self.workdir, 'http'))
+        self.client = install_sheets(FakeClient(self.fixtures.spreadsheets()))
+
+    def close(self):
+        if self.workdir:
+            shutil.rmtree(self.workdir, ignore_errors=True)
+
+
+def measure(replay, setup, run):
+    """
+    Time `run(setup())` with fresh state, then run it again under tracemalloc for its peak.
+
+    Returns:
+        (seconds, peak_bytes, result)
+    """
+    with contextlib.redirect_stdout(io.StringIO()):
+        replay.reset()
+        args = setup()
+        start = time.perf_counter()
+        result = run(*args)
+        seconds = time.perf_counter() - start
+
+        replay.reset()
+        args = setup()
+        tracemalloc.start()
+        run(*args)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return seconds, peak, result
+
+
+def stages(replay):
+    """(name, setup, run, throughput) for each measured stage; throughput is (count, unit)."""
+    fixtures = replay.fixtures
+    sizes = fixtures.sizes
+    post_html = fixtures.post['content']['rendered']
+
+    def ranked():
+        return pitchers.parse_streamer_rankings(post_html)
+
+    def matched():
+        return pitchers.espn_fuzzy_match(pd.DataFrame(ranked()), fixtures.free_agent_players(),
+                                         IdentityStore.from_env())
+
+    def merged():
+        return pitchers.process_google_sheet_data(
+            matched(), pitchers.load_eno_rankings(), opponent_rank_matrix(), IdentityStore.from_env())
+
+    def pool_snapshot():
+        # The full fetch a delta refresh starts from
+        pitchers.fetch_free_agent_pitchers(ttl=0)
+        return ()
+
+    def resync_setup():
+        df = merged()
+        pitchers.export_to_google_sheet(df, TARGET_SHEET_ID, 'Sheet2')
+        # A later run: a tenth of the rows change their blurb
+        df = df.copy()
+        df.loc[df.index[::10], 'Blurb'] = 'Updated.'
+        return (df,)
+
+    return [
+        ('parse charts', lambda: (fixtures.chart_html,), parse_chart_history, (sizes['songs'], 'songs')),
+        ('parse streamer post', lambda: (post_html,), pitchers.parse_streamer_rankings, (sizes['players'], 'players')),
+        ('fetch+parse streamer post', lambda: (), pitchers.extract_pitcher_rankings, (sizes['players'], 'players')),
+        ('fetch+parse opponents', lambda: (), opponent_rank_matrix, (30, 'teams')),
+        ('fetch espn pool', lambda: (), lambda: pitchers.fetch_free_agent_pitchers(ttl=0),
+         (min(sizes['espn_pool'], POOL_SIZE), 'players')),
+        ('refresh espn pool (delta)', pool_snapshot,
+         lambda: pitchers.fetch_free_agent_pitchers(ttl=0), (len(fixtures.espn_activity), 'transactions')),
+        ('read eno sheet', lambda: (), pitchers.load_eno_rankings, (sizes['eno_rows'], 'rows')),
+        ('match espn', lambda: (pd.DataFrame(ranked()), fixtures.free_agent_players(),
+                                IdentityStore.from_env()),
+         pitchers.espn_fuzzy_match, (sizes['players'] * sizes['espn_pool'], 'pairs')),
+        ('match eno (merge)', lambda: (matched(), pitchers.load_eno_rankings(), opponent_rank_matrix(),
+                                       IdentityStore.from_env()),
+         pitchers.process_google_sheet_data, (sizes['players'], 'players')),
+        ('export pitchers (new tab)', lambda: (merged(), TARGET_SHEET_ID, 'Sheet2'),
+         pitchers.export_to_google_sheet, (sizes['players'], 'rows')),
+        ('export pitchers (resync)', resync_setup,
+         lambda df: pitchers.export_to_google_sheet(df, TARGET_SHEET_ID, 'Sheet2'), (sizes['players'], 'rows')),
+        ('export charts', lambda: (parse_chart_history(fixtures.chart_html), TARGET_SHEET_ID, 'drake hot-100'),
+         output_to_google_sheets, (sizes['songs'], 'rows')),
+        ('pitchers pipeline', lambda: (TARGET_SHEET_ID, 'Sheet2'), pitchers.run_pipeline, (sizes['players'], 'players')),
+    ]
+
+
+def run_scale(label, fixtures):
+    print(f"\n{label}: {fixtures.sizes['songs']} songs, {fixtures.sizes['players']} ranked pitchers, "
+          f"{fixtures.sizes['espn_pool']} ESPN free agents, {fixtures.sizes['eno_rows']} Eno rows")
+    print(f"  {'stage':<28}{'wall ms':>10}{'peak MB':>10}  throughput")
+
+    with StandInServer(fixtures.resolve) as server:
+        replay = Replay(fixtures, server)
+        try:
+            for name, setup, run, (count, unit) in stages(replay):
+                seconds, peak, _ = measure(replay, setup, run)
+                print(f"  {name:<28}{seconds * 1000:>10.1f}{peak / 2 ** 20:>10.1f}  "
+                      f"{count / seconds:,.0f} {unit}/s")
+            sheets = replay.client.stats()
+            print(f"  {server.requests} HTTP requests served in all; the pipeline run made "
+                  f"{sheets['calls']} Sheets calls and wrote {sheets['cells_written']} cells")
+        finally:
+            replay.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay both jobs against local stand-ins and time each stage.")
+    parser.add_argument('--scales', type=int, nargs='+', default=[1, 10, 100],
+                        help="sizes to run, as multiples of the realistic synthetic sizes")
+    parser.add_argument('--fixtures', help="directory of recorded fixtures to replay instead of synthetic ones")
+    parser.add_argument('--record', metavar='DIR', help="record live fixtures into DIR and exit")
+    args = parser.parse_args(argv)
+
+    if args.record:
+        fixture_sets.record(args.record)
+        return 0
+
+    if args.fixtures:
+        run_scale(f"recorded fixtures ({args.fixtures})", fixture_sets.load(args.fixtures))
+    else:
+        for scale in args.scales:
+            run_scale(f"{scale}x", fixture_sets.synthetic(scale))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,17 @@
+"""
+Trims recorded pages before they are committed to bench/corpus.
+
+Scripts, styles, iframes and inline SVG are dropped: the parsers never read
+them, and they carry ad and tracking code and most of a page's size.
+Everything else, comments included, is kept as served, so the parsers see the
+real markup.
+"""
+import re
+
+DROPPED_ELEMENTS = re.compile(r'<(script|style|noscript|iframe|svg)\b[^>]*>.*?</\1\s*>', re.I | re.S)
+BLANK_LINES = re.compile(r'\n\s*\n+')
+
+
+def sanitize_html(html_content):
+    """The page without script, style, noscript, iframe and svg elements, and without runs of blank lines."""
+    return BLANK_LINES.sub('\n', DROPPED_ELEMENTS.sub('', html_content))
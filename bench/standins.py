@@ -0,0 +1,307 @@
+"""
+Local stand-ins for the live services, used by the replay benchmark.
+
+StandInServer serves recorded or synthetic responses on localhost, and
+install_transport() points the shared transport at it: a request for
+https://<host>/<path> is sent to http://127.0.0.1:<port>/<host>/<path>, so
+the real fetch, cache and parse code runs unchanged.
+
+FakeClient is an in-memory gspread client covering the calls sheets.py makes
+(values_batch_get, batch_update, worksheet reads and writes, the Drive
+revision), and counts API calls and cells written.
+"""
+import hashlib
+import json
+import threading
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import transport
+
+
+class StandInServer:
+    """
+    Serves `resolve(host, path, query, headers)` on localhost.
+
+    `resolve` returns (content_type, body) or None for a 404; `query` maps each
+    parameter to its first value and `headers` are the request headers. Every body gets an ETag, and a matching
+    If-None-Match is answered with a 304.
+    """
+
+    def __init__(self, resolve):
+        self.resolve = resolve
+        self.requests = 0
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                server.requests += 1
+                parts = urlsplit(self.path)
+                host, _, path = parts.path.lstrip('/').partition('/')
+                query = {name: values[0] for name, values in parse_qs(parts.query).items()}
+                found = server.resolve(host, '/' + path, query, self.headers)
+                if found is None:
+                    self.send_response(404)
+                    self.end_headers()
+                    return
+                content_type, body = found
+                etag = f'"{hashlib.sha256(body).hexdigest()[:16]}"'
+                if self.headers.get('If-None-Match') == etag:
+                    self.send_response(304)
+                    self.send_header('ETag', etag)
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                self.send_header('ETag', etag)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        self._httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self._httpd.daemon_threads = True
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self._httpd.server_port}"
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+
+class ReplayAdapter(HTTPAdapter):
+    """Sends every request to the stand-in server, with the original host as the first path segment."""
+
+    def __init__(self, base_url):
+        super().__init__()
+        self.base_url = base_url
+
+    def send(self, request, **kwargs):
+        parts = urlsplit(request.url)
+        request.url = f"{self.base_url}/{parts.netloc}{parts.path}" + (f"?{parts.query}" if parts.query else '')
+        return super().send(request, **kwargs)
+
+
+def install_transport(server):
+    """Replace the process-wide transport with one that talks to `server`, without rate limits."""
+    replay = transport.Transport(rates={}, max_retries=0)
+    adapter = ReplayAdapter(server.base_url)
+    replay.session.mount('https://', adapter)
+    replay.session.mount('http://', adapter)
+    transport._transport = replay
+    return replay
+
+
+def _api_error(message):
+    from gspread.exceptions import APIError
+
+    response = requests.Response()
+    response.status_code = 400
+    response._content = json.dumps({'error': {'code': 400, 'message': message, 'status': 'INVALID_ARGUMENT'}}).encode()
+    return APIError(response)
+
+
+def _trim(rows):
+    # The Sheets API leaves out trailing empty cells and rows
+    rows = [list(row) for row in rows]
+    for row in rows:
+        while row and row[-1] == '':
+            row.pop()
+    while rows and not rows[-1]:
+        rows.pop()
+    return rows
+
+
+class FakeWorksheet:
+    def __init__(self, spreadsheet, sheet_id, title, values=None, rows=1000, cols=26):
+        self.spreadsheet = spreadsheet
+        self.id = sheet_id
+        self.title = title
+        self.grid = [list(row) for row in values or []]
+        self.row_count = rows
+        self.col_count = max(cols, max((len(row) for row in self.grid), default=0))
+
+    def _cell_range(self, cells):
+        from gspread.utils import a1_range_to_grid_range
+
+        if not cells:
+            return 0, None, 0, None
+        grid_range = a1_range_to_grid_range(cells)
+        return (grid_range.get('startRowIndex', 0), grid_range.get('endRowIndex'),
+                grid_range.get('startColumnIndex', 0), grid_range.get('endColumnIndex'))
+
+    def read(self, cells='', major_dimension='ROWS'):
+        start_row, end_row, start_column, end_column = self._cell_range(cells)
+        rows = [row[start_column:end_column] for row in self.grid[start_row:end_row]]
+        if major_dimension == 'COLUMNS':
+            width = max((len(row) for row in rows), default=0)
+            rows = [[row[column] if column < len(row) else '' for row in rows] for column in range(width)]
+        return _trim(rows)
+
+    def get_all_values(self):
+        from gspread.utils import fill_gaps
+
+        self.spreadsheet.count('get_all_values')
+        values = _trim(self.grid)
+        return fill_gaps(values) if values else []
+
+    def add_cols(self, count):
+        self.spreadsheet.count('add_cols')
+        self.col_count += count
+
+    def clear(self):
+        self.spreadsheet.count('clear')
+        self.spreadsheet.touch()
+        self.grid = []
+
+    def update(self, values, value_input_option=None):
+        self.spreadsheet.count('update')
+        self.spreadsheet.touch()
+        self.spreadsheet.cells_written += sum(len(row) for row in values)
+        for index, row in enumerate(values):
+            self._ensure(index + 1, len(row))
+            self.grid[index][:len(row)] = [str(value) for value in row]
+
+    def _ensure(self, rows, columns):
+        while len(self.grid) < rows:
+            self.grid.append([])
+        for row in self.grid[:rows]:
+            if len(row) < columns:
+                row.extend([''] * (columns - len(row)))
+
+
+class FakeSpreadsheet:
+    def __init__(self, spreadsheet_id, worksheets=None):
+        self.id = spreadsheet_id
+        self.calls = Counter()
+        self.cells_written = 0
+        self.revision = 0
+        self._worksheets = {}
+        for title, values in (worksheets or {}).items():
+            self.add_worksheet(title, values=values, counted=False)
+
+    def count(self, call):
+        self.calls[call] += 1
+
+    def touch(self):
+        self.revision += 1
+
+    def get_lastUpdateTime(self):
+        # Drive's modifiedTime; any increasing value will do
+        self.count('drive_metadata')
+        return f"revision-{self.revision}"
+
+    def worksheet(self, title):
+        from gspread.exceptions import WorksheetNotFound
+
+        self.count('worksheet')
+        if title not in self._worksheets:
+            raise WorksheetNotFound(title)
+        return self._worksheets[title]
+
+    def add_worksheet(self, title, rows=1000, cols=26, values=None, counted=True):
+        if counted:
+            self.count('add_worksheet')
+        worksheet = FakeWorksheet(self, len(self._worksheets), title, values, rows, cols)
+        self._worksheets[title] = worksheet
+        return worksheet
+
+    def values_batch_get(self, ranges, params=None):
+        self.count('values_batch_get')
+        major_dimension = (params or {}).get('majorDimension', 'ROWS')
+        value_ranges = []
+        for range_name in ranges:
+            title, cells = _split_range(range_name)
+            if title not in self._worksheets:
+                raise _api_error(f"Unable to parse range: {range_name}")
+            values = self._worksheets[title].read(cells, major_dimension)
+            value_ranges.append({'range': range_name, 'majorDimension': major_dimension, 'values': values})
+        return {'spreadsheetId': self.id, 'valueRanges': value_ranges}
+
+    def batch_update(self, body):
+        self.count('batch_update')
+        self.touch()
+        by_id = {worksheet.id: worksheet for worksheet in self._worksheets.values()}
+        for request in body['requests']:
+            (kind, spec), = request.items()
+            if kind == 'updateCells':
+                cell_range = spec['range']
+                worksheet = by_id[cell_range['sheetId']]
+                row_index = cell_range['startRowIndex']
+                for offset, row in enumerate(spec['rows']):
+                    values = [cell.get('userEnteredValue', {}).get('stringValue', '') for cell in row['values']]
+                    start = cell_range['startColumnIndex']
+                    worksheet._ensure(row_index + offset + 1, start + len(values))
+                    worksheet.grid[row_index + offset][start:start + len(values)] = values
+                    self.cells_written += len(values)
+            elif kind in ('insertDimension', 'deleteDimension'):
+                dimension = spec['range']
+                worksheet = by_id[dimension['sheetId']]
+                start, end = dimension['startIndex'], dimension['endIndex']
+                if kind == 'insertDimension':
+                    worksheet._ensure(start, 0)
+                    worksheet.grid[start:start] = [[] for _ in range(end - start)]
+                else:
+                    del worksheet.grid[start:end]
+            else:
+                raise _api_error(f"Unsupported request: {kind}")
+        return {'replies': [{} for _ in body['requests']]}
+
+
+def _split_range(range_name):
+    """Split "'Title'!A1:B2" (as built by gspread's absolute_range_name) into title and cells."""
+    if range_name.startswith("'"):
+        end = range_name.rindex("'")
+        return range_name[1:end].replace("''", "'"), range_name[end + 2:]
+    title, _, cells = range_name.partition('!')
+    return title, cells
+
+
+class FakeClient:
+    """
+    In-memory stand-in for an authorized gspread client.
+
+    Args:
+        spreadsheets: {spreadsheet_id: {worksheet_title: values}} to start with.
+    """
+
+    def __init__(self, spreadsheets=None):
+        self.spreadsheets = {
+            spreadsheet_id: FakeSpreadsheet(spreadsheet_id, worksheets)
+            for spreadsheet_id, worksheets in (spreadsheets or {}).items()
+        }
+
+    def open_by_key(self, spreadsheet_id):
+        if spreadsheet_id not in self.spreadsheets:
+            self.spreadsheets[spreadsheet_id] = FakeSpreadsheet(spreadsheet_id)
+        self.spreadsheets[spreadsheet_id].count('open_by_key')
+        return self.spreadsheets[spreadsheet_id]
+
+    def stats(self):
+        """API calls made and cells written, summed over every spreadsheet."""
+        calls = sum((spreadsheet.calls for spreadsheet in self.spreadsheets.values()), Counter())
+        cells = sum(spreadsheet.cells_written for spreadsheet in self.spreadsheets.values())
+        return {'calls': sum(calls.values()), 'cells_written': cells, 'by_call': dict(calls)}
+
+
+def install_sheets(client):
+    """Make sheets.py use `client` instead of building an authorized one."""
+    import sheets
+
+    with sheets._lock:
+        sheets._client = client
+        sheets._spreadsheets.clear()
+    return client
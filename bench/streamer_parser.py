@@ -0,0 +1,250 @@
+"""
+Checks that both parse_streamer_rankings backends give the same records as the
+original parser, and times all three.
+
+Run from the repository root:
+
+    python -m bench.streamer_parser                    # saved corpus, plus synthetic and edge-case posts
+    python -m bench.streamer_parser posts/123.json ... # specific saved posts (.json or .html)
+    python -m bench.streamer_parser --record [--limit 20]
+                                                       # save past streamer posts into the corpus
+
+The corpus is committed in bench/corpus/streamer: one JSON file per post, with
+the listing fields and the rendered content as the WordPress API returned them,
+minus scripts and embeds (see bench/sanitize.py). Exits non-zero if the
+corpus is empty or the parsers disagree on any post.
+"""
+import argparse
+import glob
+import json
+import os
+import random
+import re
+import sys
+import time
+
+from bench.sanitize import sanitize_html
+from fbb.pitchers import parse_streamer_rankings
+
+CORPUS_DIR = os.path.join(os.path.dirname(__file__), 'corpus', 'streamer')
+
+
+def reference_parse(html_content):
+    """The original parser from extract_pitcher_rankings, kept verbatim for comparison."""
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html_content, 'html.parser')
+
+    rankings = []
+    start_collecting = False
+    current_tier = None
+
+    tier_keywords = {
+        "Auto-Starts": "Auto-Start",
+        "Probably Starts": "Probably Start",
+        "Questionable Starts": "Questionable Start",
+        "Do Not Starts": "Do Not Start"
+    }
+
+    for p_tag in soup.find_all('p'):
+        text = p_tag.get_text(strip=True)
+
+        if re.search(r"Starting Pitcher Streamer Rankings", text, re.I):
+            start_collecting = True
+            continue
+
+        if start_collecting:
+            for key in tier_keywords.keys():
+                if re.search(key, text, re.I):
+                    current_tier = tier_keywords[key]
+                    break
+
+            strong_tag = p_tag.find('strong')
+            if strong_tag:
+                player_link = strong_tag.find('a', class_='player-tag')
+                if player_link:
+                    player_name = player_link.get_text(strip=True)
+
+                    after_player = strong_tag.get_text()
+                    opponent_match = re.search(r'vs\. ([A-Z]+)|@ ([A-Z]+)', after_player)
+                    if opponent_match:
+                        opponent = opponent_match.group(1) or opponent_match.group(2)
+                    else:
+                        opponent = None
+
+                    blurb = p_tag.get_text().replace(strong_tag.get_text(), '').strip(' –—')
+
+                    rankings.append({
+                        'Tier': current_tier,
+                        'Player': player_name,
+                        'Opponent': opponent,
+                        'Blurb': blurb
+                    })
+
+    return rankings
+
+
+TEAMS = ['ARI', 'ATL', 'BAL', 'BOS', 'CHC', 'CWS', 'CIN', 'CLE', 'COL', 'DET', 'HOU', 'KCR', 'LAA', 'LAD', 'MIA',
+         'MIL', 'MIN', 'NYM', 'NYY', 'ATH', 'PHI', 'PIT', 'SDP', 'SFG', 'SEA', 'STL', 'TBR', 'TEX', 'TOR', 'WSN']
+TIERS = ['Auto-Starts', 'Probably Starts', 'Questionable Starts', 'Do Not Starts']
+
+PLAYER_TEMPLATES = [
+    '<p><strong><a class="player-tag" href="https://pitcherlist.com/player/{slug}/">{name}</a> ({team}) {where} {opponent}</strong> – {blurb}</p>',
+    '<p><strong><a href="#" class="pl-link player-tag">{name}</a>&nbsp;{where} {opponent}</strong>{blurb}</p>',
+    '<p><span><strong>  <a class="player-tag">{name}</a>\n {where} {opponent}</strong></span> — <em>{blurb}</em><!-- note --></p>',
+    '<p><strong>{name} {where} {opponent}</strong> – {blurb}</p>',
+    '<p><b>Note:</b> <strong><a class="player-tag" href="#">{name}</a> <span>{where}</span> {opponent}</strong>'
+    ' &mdash; {blurb} &#8211; <script>var x = "{name}";</script>tail&#x2019;s</p>',
+]
+BLURBS = [
+    "He has a 3.12 ERA over his last five starts &amp; a 28% strikeout rate.",
+    "Risky matchup, but the <a href=\"#\">Stuff+</a> is elite.",
+    "Café con leche: the changeup is working. Auto-Starts are rare this week.",
+    "Fine as a streamer in deeper leagues.<br>Keep an eye on the pitch count.",
+    "",
+]
+
+
+def synthetic_post(players, seed=0):
+    """Build rendered post HTML shaped like a Pitcher List streamer post with `players` entries."""
+    rng = random.Random(seed)
+    parts = [
+        '<p>Welcome back to the daily streamer column.</p>',
+        '<h2>Starting Pitcher Streamer Rankings</h2>',
+        '<p>Here are the <strong>Starting Pitcher Streamer Rankings</strong> for today.</p>',
+        '<figure><img src="x.png"><figcaption>Chart</figcaption></figure>',
+    ]
+    per_tier = max(1, players // len(TIERS))
+    for tier in TIERS:
+        parts.append(f'<p><strong>{tier}</strong></p>')
+        for _ in range(per_tier):
+            name = f"{rng.choice(['Max', 'José', 'Logan', 'Shōta'])} {rng.choice(['Fried', 'Berríos', 'Webb', 'Imanaga'])}"
+            parts.append(rng.choice(PLAYER_TEMPLATES).format(
+                slug=name.lower().replace(' ', '-'),
+                name=name,
+                team=rng.choice(TEAMS),
+                where=rng.choice(['vs.', '@', 'at']),
+                opponent=rng.choice(TEAMS),
+                blurb=rng.choice(BLURBS),
+            ))
+        parts.append('<ul><li>Not a paragraph</li></ul>')
+    parts.append('<p>Thanks for reading the Starting Pitcher Streamer Rankings!</p>')
+    return ''.join(parts)
+
+
+# Entity references lxml decodes differently, which send a post to the bs4 backend
+EDGE_CASE_POST = (
+    '<p>Starting Pitcher Streamer Rankings</p><p><strong>Auto-Starts</strong></p>'
+    '<p><strong><a class="player-tag">Max Fried</a> vs. NYY</strong> – fine &bogus; and &amp unterminated</p>'
+)
+# Block elements and nested paragraphs inside a <p>, which lxml's parser closes the paragraph at
+BLOCK_CASE_POST = (
+    '<p>Starting Pitcher Streamer Rankings</p><p><strong>Auto-Starts</strong></p>'
+    '<p><strong><a class="player-tag">Logan Webb</a> @ SFG</strong> blah <div>extra</div> tail</p>'
+    '<p><strong><a class="player-tag">Shota Imanaga</a> vs. MIL</strong> list <ul><li>one</li></ul> after</p>'
+    '<p><strong><a class="player-tag">Jose Berrios</a> vs. BOS</strong> outer <p>inner</p> tail</p>'
+)
+
+# Bodies with no paragraphs at all, which lxml refuses to parse
+EMPTY_CASES = ['', '  \n', '<!-- wp:paragraph -->', '<!-- wp:paragraph --><!-- /wp:paragraph -->', '</table>', '</span>']
+# Misnested tags, where a paragraph ends depends on elements outside it
+MISNESTED_POST = (
+    '<p>Starting Pitcher Streamer Rankings</p><p><strong>Auto-Starts</strong></p>'
+    '<strong><p><strong><a class="player-tag">Max Fried</a> vs. NYY</strong> nested in strong</p></strong>'
+    '<p>\n</em>\n<strong><a class="player-tag">Logan Webb</a> @ SFG</strong> stray end tag</p>'
+    '<em><p><strong><a class="player-tag">Shota Imanaga</a> vs. MIL</strong> closed by </em> the em</p>'
+    '<table><p>Probably Starts</table><p><strong><a class="player-tag">Jose Berrios</a> vs. BOS</strong> after</p>'
+)
+
+
+def load_post(path):
+    with open(path, encoding='utf-8') as f:
+        if path.endswith('.json'):
+            return json.load(f)['content']['rendered']
+        return f.read()
+
+
+def record(directory, limit=None):
+    """Save the newest `limit` streamer posts (all of them by default), sanitized, into `directory`."""
+    from fbb.pitcherlist import iter_streamer_posts
+
+    os.makedirs(directory, exist_ok=True)
+    count = 0
+    for post in iter_streamer_posts():
+        if limit is not None and count >= limit:
+            break
+        saved = {field: post[field] for field in ('id', 'date', 'modified', 'title', 'link')}
+        saved['content'] = {'rendered': sanitize_html(post['content']['rendered'])}
+        with open(os.path.join(directory, f"{post['id']}.json"), 'w', encoding='utf-8') as f:
+            json.dump(saved, f, ensure_ascii=False, indent=1)
+        count += 1
+    print(f"Saved {count} posts to {directory}")
+
+
+def time_parser(parse, html_content, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        rows = parse(html_content)
+    return (time.perf_counter() - start) / repeat, rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare and time the streamer rankings parsers.")
+    parser.add_argument('paths', nargs='*', help="saved posts (.json from the WordPress API, or .html)")
+    parser.add_argument('--record', action='store_true', help=f"save every past streamer post into {CORPUS_DIR}")
+    parser.add_argument('--limit', type=int, default=None, help="with --record, save only the newest LIMIT posts")
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args(argv)
+
+    if args.record:
+        record(CORPUS_DIR, args.limit)
+        return 0
+
+    if args.paths:
+        posts = [(path, load_post(path)) for path in args.paths]
+    else:
+        paths = sorted(glob.glob(os.path.join(CORPUS_DIR, '*.json')))
+        if not paths:
+            print(f"No saved posts in {CORPUS_DIR}; record some with --record")
+            return 1
+        posts = [(os.path.relpath(path), load_post(path)) for path in paths]
+        posts += [(f"synthetic {n} players", synthetic_post(n, seed=n)) for n in (20, 100, 400)]
+        posts.append(("edge cases", EDGE_CASE_POST))
+        posts.append(("blocks inside paragraphs", BLOCK_CASE_POST))
+        posts.append(("misnested tags", MISNESTED_POST))
+        posts += [(f"no paragraphs {html_content!r}", html_content) for html_content in EMPTY_CASES]
+
+    parsers = [
+        ('bs4', lambda html_content: parse_streamer_rankings(html_content, parser='bs4')),
+        ('lxml', lambda html_content: parse_streamer_rankings(html_content, parser='lxml')),
+    ]
+    mismatches = 0
+    totals = {'original': 0.0, 'bs4': 0.0, 'lxml': 0.0}
+    for name, html_content in posts:
+        reference_time, reference_rows = time_parser(reference_parse, html_content, args.repeat)
+        totals['original'] += reference_time
+        timings = []
+
+        for parser_name, parse in parsers:
+            parser_time, rows = time_parser(parse, html_content, args.repeat)
+            totals[parser_name] += parser_time
+            timings.append(f"{parser_name} {parser_time * 1000:.1f} ms ({reference_time / parser_time:.1f}x)")
+
+            if rows != reference_rows:
+                mismatches += 1
+                print(f"MISMATCH {name}: original gave {len(reference_rows)} rows, {parser_name} gave {len(rows)}")
+                for reference_row, row in zip(reference_rows, rows):
+                    if reference_row != row:
+                        print(f"  first difference:\n    original: {reference_row}\n    {parser_name}: {row}")
+                        break
+
+        print(f"{name}: {len(reference_rows)} rows, original {reference_time * 1000:.1f} ms, " + ", ".join(timings))
+
+    kilobytes = sum(len(html_content.encode('utf-8')) for _, html_content in posts) / 1024
+    print(f"{len(posts)} posts, {kilobytes:.0f} KB: " + ", ".join(
+        f"{parser_name} {kilobytes / total:.0f} KB/s" for parser_name, total in totals.items()))
+    return 1 if mismatches else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,139 @@
+"""
+Command-line entry point for the tracker jobs.
+
+    python cli.py charts [artist:chart ...]         scrape Billboard chart history to Google Sheets
+    python cli.py pitchers                          build the starting pitcher streamer sheet
+    python cli.py dry-run charts [artist:chart ...] run a job without writing to Google Sheets
+    python cli.py dry-run pitchers
+    python cli.py pitchers --leagues leagues.json   one tab per league, sharing every other fetch
+    python cli.py watch [--interval 300]            keep the pitcher sheet current: poll each source's
+                                                    cheap signal, re-run only what changed
+    python cli.py backfill --out DIR [--start YYYY-MM-DD] [--end YYYY-MM-DD]
+                                                    store every weekly Hot 100 chart (resumable)
+
+    python cli.py --metrics metrics.jsonl pitchers  also append per-stage metrics (JSON lines)
+    python cli.py --profile espn_match pitchers     cProfile one stage ('*' for every stage)
+    python cli.py --trace-memory merged pitchers    trace one stage's allocations with tracemalloc
+
+Each subcommand imports only the job it runs, so `--help` and the chart job
+start without loading pandas, espn_api or the Google client libraries.
+"""
+import argparse
+import sys
+
+
+def run_charts(args):
+    import scraper
+    scraper.main(args.targets, dry_run=args.dry_run)
+
+
+def run_pitchers(args):
+    from fbb import pitchers
+    leagues = pitchers.configured_leagues(args.leagues)
+    if leagues:
+        tables, _ = pitchers.run_leagues(leagues, export=not args.dry_run)
+    else:
+        df, _ = pitchers.run_pipeline(args.sheet_id, args.sheet_name, export=not args.dry_run)
+        tables = {None: df}
+    if args.dry_run:
+        for name, df in tables.items():
+            if name is not None:
+                print(f"{name}:")
+            print(df.to_string())
+    else:
+        print("Success")
+
+
+def run_watch(args):
+    from fbb import pitchers
+    try:
+        pitchers.watch_pipeline(args.sheet_id, args.sheet_name, export=not args.no_export,
+                                leagues=pitchers.configured_leagues(args.leagues),
+                                interval=args.interval, duration=args.duration)
+    except KeyboardInterrupt:
+        print("Stopped watching")
+
+
+def run_backfill(args):
+    from datetime import date
+    import backfill
+
+    failed = backfill.backfill(
+        args.out,
+        chart=args.chart,
+        start=date.fromisoformat(args.start) if args.start else backfill.FIRST_CHART,
+        end=date.fromisoformat(args.end) if args.end else None,
+        fetch_workers=args.workers,
+        delay=args.delay,
+        processes=args.processes,
+    )
+    if failed:
+        sys.exit(1)
+
+
+def add_chart_arguments(parser):
+    parser.add_argument('targets', nargs='*', metavar='artist:chart',
+                        help="artist slug and chart, e.g. drake:hot-100 (default: Drake's Hot 100 history)")
+    parser.set_defaults(func=run_charts)
+
+
+def add_pitcher_arguments(parser):
+    parser.add_argument('--sheet-id', default=None, help="target spreadsheet ID (default: SECRET_GOOGLE_SPREADSHEET_ID)")
+    parser.add_argument('--sheet-name', default='Sheet2', help="target worksheet name")
+    parser.add_argument('--leagues', default=None,
+                        help="JSON file of leagues to run together, one tab each (default: FBB_LEAGUES_FILE or SECRET_FBB_LEAGUES)")
+    parser.set_defaults(func=run_pitchers)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='cli.py', description="Tracker scraping jobs.")
+    parser.add_argument('--metrics', metavar='FILE', help="append per-stage metrics to FILE (default: METRICS_FILE)")
+    parser.add_argument('--profile', metavar='STAGE', action='append',
+                        help="run a stage under cProfile; repeat for more stages, or '*' for all")
+    parser.add_argument('--trace-memory', metavar='STAGE', action='append',
+                        help="trace a stage's allocations with tracemalloc; repeat for more stages, or '*' for all")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    charts = commands.add_parser('charts', help="scrape Billboard chart history into Google Sheets")
+    add_chart_arguments(charts)
+    charts.set_defaults(dry_run=False)
+
+    pitchers = commands.add_parser('pitchers', help="build the starting pitcher streamer sheet")
+    add_pitcher_arguments(pitchers)
+    pitchers.set_defaults(dry_run=False)
+
+    dry_run = commands.add_parser('dry-run', help="run a job and print the result without writing to Google Sheets")
+    jobs = dry_run.add_subparsers(dest='job', required=True)
+    add_chart_arguments(jobs.add_parser('charts', help="scrape chart history and print it"))
+    add_pitcher_arguments(jobs.add_parser('pitchers', help="build the streamer table and print it"))
+    dry_run.set_defaults(dry_run=True)
+
+    watch = commands.add_parser('watch', help="re-run the pitcher pipeline whenever one of its sources changes")
+    add_pitcher_arguments(watch)
+    watch.add_argument('--interval', type=float, default=None, help="seconds between polls (default: WATCH_INTERVAL or 300)")
+    watch.add_argument('--duration', type=float, default=None, help="stop after this many seconds (default: never)")
+    watch.add_argument('--no-export', action='store_true', help="rebuild the tables without writing them to the sheet")
+    watch.set_defaults(func=run_watch)
+
+    backfill = commands.add_parser('backfill', help="store every weekly chart into Parquet files (resumable)")
+    backfill.add_argument('--out', required=True, help="output directory (also holds the checkpoint)")
+    backfill.add_argument('--chart', default='hot-100', help="chart slug (default: hot-100)")
+    backfill.add_argument('--start', help="first week, YYYY-MM-DD (default: 1958-08-04)")
+    backfill.add_argument('--end', help="last week, YYYY-MM-DD (default: today)")
+    backfill.add_argument('--workers', type=int, default=4, help="concurrent fetches")
+    backfill.add_argument('--delay', type=float, default=1.0, help="seconds between requests to the same host")
+    backfill.add_argument('--processes', type=int, default=None, help="parser processes (default: one per core)")
+    backfill.set_defaults(func=run_backfill)
+
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    import metrics
+    metrics.configure(metrics_file=args.metrics, profile=args.profile, trace_memory=args.trace_memory)
+    args.func(args)
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,314 @@
+"""
+Local snapshot of a league's free-agent pitchers, keyed by ESPN player ID.
+
+The pool is refreshed in three ways, cheapest first:
+
+    within ESPN_POOL_TTL seconds of the last refresh   the snapshot is used as is and ESPN is not contacted
+    after that, until the next full refresh            only the league's recent activity is read: players
+                                                       added or traded since then leave the pool, and
+                                                       dropped players are looked up by ID and join it
+                                                       if they are still free agents
+    every ESPN_POOL_FULL_REFRESH seconds               the whole pool is fetched again (one request)
+
+The snapshot lives in ESPN_POOL_DB (default .espn_pool.sqlite), one pool per
+league and season. In memory the pool is a FreeAgentPool: compact records
+indexed by player ID and by normalized name.
+"""
+import json
+import os
+import sqlite3
+import time
+from collections import namedtuple
+from contextlib import closing
+
+from fbb.matching import normalize_name
+from transport import get_transport
+
+POOL_SIZE = 500
+PITCHER_SLOT = 13  # lineup slot 'P' in espn_api.baseball.constant.POSITION_MAP
+DEFAULT_TTL = 60 * 60
+DEFAULT_FULL_REFRESH = 24 * 60 * 60
+
+# League activity message types (espn_api.baseball.constant.ACTIVITY_MAP)
+ADDED_MESSAGES = {178, 180, 244}  # FA added, waiver added, traded
+DROPPED_MESSAGES = {179, 181, 239}
+ACTIVITY_PAGE_SIZE = 50
+MAX_ACTIVITY_PAGES = 10  # more activity than this since the last refresh: fetch the whole pool instead
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS players (
+    pool TEXT NOT NULL,
+    player_id INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    pro_team TEXT,
+    position TEXT,
+    eligible_slots TEXT NOT NULL,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (pool, player_id)
+);
+CREATE TABLE IF NOT EXISTS refreshes (
+    pool TEXT PRIMARY KEY,
+    refreshed_at REAL NOT NULL,
+    full_at REAL NOT NULL
+);
+"""
+
+# The fields of an ESPN player the pipeline uses, named as in espn_api
+FreeAgent = namedtuple('FreeAgent', ['playerId', 'name', 'proTeam', 'position', 'eligibleSlots'])
+
+
+class FreeAgentPool:
+    """Free agents indexed by player ID and by normalized name. Iterates in pool order."""
+
+    def __init__(self, players):
+        self.by_id = {}
+        for player in players:
+            self.by_id.setdefault(player.playerId, player)
+        self.names = [player.name for player in self.by_id.values()]
+        # The first player with a given normalized name wins, as in resolve_names
+        self.by_name = {}
+        for player in self.by_id.values():
+            self.by_name.setdefault(normalize_name(player.name), player)
+        self.by_name.pop('', None)
+
+    def __iter__(self):
+        return iter(self.by_id.values())
+
+    def __len__(self):
+        return len(self.by_id)
+
+    def find(self, name):
+        """The player whose normalized name matches `name`, or None."""
+        return self.by_name.get(normalize_name(name))
+
+    def exact_matches(self, names, candidates):
+        """
+        Match names to candidate player names by normalized name, with no fuzzy scoring.
+
+        Returns:
+            {name: (candidate, 100.0)} for every name whose normalized form is a
+            candidate's; each candidate is used at most once.
+        """
+        available = set(candidates)
+        matches = {}
+        for name in dict.fromkeys(names):
+            player = self.find(name)
+            if player is not None and player.name in available:
+                matches[name] = (player.name, 100.0)
+                available.discard(player.name)
+        return matches
+
+
+class PoolSnapshot:
+    """The on-disk pools, one per league and season."""
+
+    def __init__(self, path='.espn_pool.sqlite'):
+        self.path = path
+        with closing(self._connect()) as conn, conn:
+            conn.executescript(SCHEMA)
+
+    @classmethod
+    def from_env(cls):
+        return cls(os.environ.get('ESPN_POOL_DB', '.espn_pool.sqlite'))
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    def load(self, pool):
+        """
+        Returns:
+            (players, refreshed_at, full_at), or (None, None, None) if the pool was never fetched.
+        """
+        with closing(self._connect()) as conn:
+            refresh = conn.execute("SELECT refreshed_at, full_at FROM refreshes WHERE pool = ?", (pool,)).fetchone()
+            if refresh is None:
+                return None, None, None
+            rows = conn.execute(
+                "SELECT player_id, name, pro_team, position, eligible_slots FROM players WHERE pool = ? ORDER BY rowid",
+                (pool,),
+            ).fetchall()
+        players = [
+            FreeAgent(player_id, name, pro_team, position, json.loads(slots))
+            for player_id, name, pro_team, position, slots in rows
+        ]
+        return players, refresh[0], refresh[1]
+
+    def replace(self, pool, players, now):
+        """Store a fully fetched pool."""
+        with closing(self._connect()) as conn, conn:
+            conn.execute("DELETE FROM players WHERE pool = ?", (pool,))
+            self._upsert(conn, pool, players, now)
+            conn.execute(
+                "INSERT OR REPLACE INTO refreshes (pool, refreshed_at, full_at) VALUES (?, ?, ?)", (pool, now, now))
+
+    def apply(self, pool, removed_ids, players, now):
+        """Apply a delta refresh: drop `removed_ids` and add or update `players`."""
+        with closing(self._connect()) as conn, conn:
+            conn.executemany("DELETE FROM players WHERE pool = ? AND player_id = ?",
+                             [(pool, player_id) for player_id in removed_ids])
+            self._upsert(conn, pool, players, now)
+            conn.execute("UPDATE refreshes SET refreshed_at = ? WHERE pool = ?", (now, pool))
+
+    def _upsert(self, conn, pool, players, now):
+        conn.executemany(
+            "INSERT OR REPLACE INTO players (pool, player_id, name, pro_team, position, eligible_slots, updated_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [(pool, player.playerId, player.name, player.proTeam, player.position,
+              json.dumps(list(player.eligibleSlots)), now) for player in players],
+        )
+
+
+def parse_free_agents(entries, season):
+    """The FreeAgent records for the pitchers among ESPN player entries (a kona_player_info 'players' list)."""
+    from espn_api.baseball.player import Player
+
+    free_agents = []
+    for entry in entries:
+        player = Player(entry, season)
+        if 'P' in player.eligibleSlots:
+            free_agents.append(FreeAgent(player.playerId, player.name, player.proTeam, player.position,
+                                         list(player.eligibleSlots)))
+    return free_agents
+
+
+class LeagueClient:
+    """
+    The two ESPN league reads the pool needs, sent through the shared transport.
+
+    Uses espn_api for the endpoint, status handling and player parsing, without
+    building a League (which fetches the settings, every pro player and the draft).
+    """
+
+    def __init__(self, league_id, season, espn_s2=None, swid=None):
+        # Imported here rather than at the top, so the CLI can start without espn_api
+        from espn_api.requests.espn_requests import EspnFantasyRequests
+
+        cookies = {'espn_s2': espn_s2, 'SWID': swid} if espn_s2 and swid else None
+        self.season = season
+        self.requests = EspnFantasyRequests(sport='mlb', year=season, league_id=league_id, cookies=cookies)
+
+    def _get(self, params, headers, extend=''):
+        response = get_transport().get(self.requests.LEAGUE_ENDPOINT + extend, params=params, headers=headers,
+                                       cookies=self.requests.cookies)
+        # Same handling as EspnFantasyRequests.league_get (alternate endpoint on 401, typed errors)
+        data = self.requests.checkRequestStatus(response.status_code, extend=extend, params=params, headers=headers)
+        if data is None:
+            data = response.json()
+        return data[0] if isinstance(data, list) else data
+
+    def free_agents(self, player_ids=None):
+        """
+        The most owned free agents and waiver-wire players eligible to pitch.
+
+        Args:
+            player_ids: Only look up these players (as many as are free agents).
+        """
+        return parse_free_agents(self.player_entries(player_ids), self.season)
+
+    def player_entries(self, player_ids=None):
+        """The raw ESPN entries behind free_agents()."""
+        players_filter = {
+            'filterStatus': {'value': ['FREEAGENT', 'WAIVERS']},
+            'filterSlotIds': {'value': [PITCHER_SLOT]},
+            'limit': POOL_SIZE,
+            'sortPercOwned': {'sortPriority': 1, 'sortAsc': False},
+            'sortDraftRanks': {'sortPriority': 100, 'sortAsc': True, 'value': 'STANDARD'},
+        }
+        if player_ids is not None:
+            players_filter['filterIds'] = {'value': list(player_ids)}
+            players_filter['limit'] = len(players_filter['filterIds']['value'])
+        data = self._get({'view': 'kona_player_info'}, {'x-fantasy-filter': json.dumps({'players': players_filter})})
+        return data.get('players', [])
+
+    def activity(self, page):
+        """One page of the league's transactions (ESPN topics), newest first."""
+        activity_filter = {'topics': {
+            'filterType': {'value': ['ACTIVITY_TRANSACTIONS']},
+            'limit': ACTIVITY_PAGE_SIZE,
+            'limitPerMessageSet': {'value': 25},
+            'offset': page * ACTIVITY_PAGE_SIZE,
+            'sortMessageDate': {'sortPriority': 1, 'sortAsc': False},
+            'sortFor': {'sortPriority': 2, 'sortAsc': False},
+            'filterIncludeMessageTypeIds': {'value': sorted(ADDED_MESSAGES | DROPPED_MESSAGES)},
+        }}
+        return self._get({'view': 'kona_league_communication'},
+                         {'x-fantasy-filter': json.dumps(activity_filter)}, extend='/communication/')['topics']
+
+    def roster_changes(self, since):
+        """
+        Players added, traded or dropped since `since` (a Unix time).
+
+        Returns:
+            {player_id: 'added' or 'dropped'} with each player's latest change,
+            or None if there was more activity than MAX_ACTIVITY_PAGES pages.
+        """
+        since_ms = since * 1000
+        messages = []
+        for page in range(MAX_ACTIVITY_PAGES):
+            topics = self.activity(page)
+            recent = [topic for topic in topics if topic['date'] >= since_ms]
+            messages.extend((topic['date'], message) for topic in recent for message in topic['messages'])
+            # Newest first: stop at the first page that reaches back past `since`, or the last page
+            if len(recent) < len(topics) or len(topics) < ACTIVITY_PAGE_SIZE:
+                break
+        else:
+            return None
+
+        # Oldest first, so a player's latest change wins
+        changes = {}
+        for _, message in sorted(messages, key=lambda item: item[0]):
+            if message['messageTypeId'] in ADDED_MESSAGES:
+                changes[message['targetId']] = 'added'
+            elif message['messageTypeId'] in DROPPED_MESSAGES:
+                changes[message['targetId']] = 'dropped'
+        return changes
+
+
+def fetch_free_agents(league_id, season, espn_s2=None, swid=None, ttl=None, full_refresh=None, snapshot=None):
+    """
+    Return the league's free-agent pitchers, refreshing the local snapshot only as much as needed.
+
+    Args:
+        league_id: ESPN league ID.
+        season: Season year.
+        espn_s2, swid: ESPN cookies for a private league.
+        ttl: Seconds the snapshot is used without contacting ESPN (ESPN_POOL_TTL, default one hour).
+        full_refresh: Seconds between full fetches of the pool (ESPN_POOL_FULL_REFRESH, default one day).
+        snapshot: PoolSnapshot to use (default: from the environment).
+
+    Returns:
+        A FreeAgentPool.
+    """
+    ttl = float(os.environ.get('ESPN_POOL_TTL', DEFAULT_TTL)) if ttl is None else ttl
+    full_refresh = float(os.environ.get('ESPN_POOL_FULL_REFRESH', DEFAULT_FULL_REFRESH)) if full_refresh is None else full_refresh
+    snapshot = snapshot or PoolSnapshot.from_env()
+    pool = f"{league_id}:{season}"
+    now = time.time()
+
+    players, refreshed_at, full_at = snapshot.load(pool)
+    if players is not None and now - refreshed_at < ttl:
+        print(f"ESPN pool: {len(players)} free agents from the snapshot ({(now - refreshed_at) / 60:.0f} min old)")
+        return FreeAgentPool(players)
+
+    client = LeagueClient(league_id, season, espn_s2, swid)
+    changes = None
+    if players is not None and now - full_at < full_refresh:
+        # Overlap the last refresh a little, so nothing that landed while it ran is missed
+        changes = client.roster_changes(refreshed_at - 60)
+
+    if changes is None:
+        players = client.free_agents()
+        snapshot.replace(pool, players, now)
+        print(f"ESPN pool: fetched {len(players)} free agents")
+        return FreeAgentPool(players)
+
+    dropped = [player_id for player_id, change in changes.items() if change == 'dropped']
+    joined = client.free_agents(dropped) if dropped else []
+    joined_ids = {player.playerId for player in joined}
+    removed = [player_id for player_id in changes if player_id not in joined_ids]
+    snapshot.apply(pool, removed, joined, now)
+
+    players, _, _ = snapshot.load(pool)
+    print(f"ESPN pool: {len(changes)} roster changes since the last refresh "
+          f"({len(joined)} back in the pool); {len(players)} free agents")
+    return FreeAgentPool(players)
@@ -0,0 +1,181 @@
+"""
+Persistent store of confirmed player name matches.
+
+Each source ('espn', 'eno', ...) maps a Pitcher List name to the name that
+source uses for the same player. Once a name has been matched it is looked up
+here on later runs instead of being fuzzy-matched again, so results stay the
+same from run to run.
+
+Bad matches can be pinned from the command line:
+
+    python -m fbb.identity list espn
+    python -m fbb.identity pin espn "Luis Garcia" "Luis García"
+    python -m fbb.identity pin espn "Luis Garcia" --none   # never match
+    python -m fbb.identity forget espn "Luis Garcia"
+
+or in a JSON file (PLAYER_ID_PINS, default fbb/player_pins.json) that is
+loaded on every run, e.g. {"espn": {"Luis Garcia": "Luis García"}}.
+"""
+import argparse
+import json
+import os
+import sqlite3
+import time
+from contextlib import closing
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS matches (
+    source TEXT NOT NULL,
+    name TEXT NOT NULL,
+    target TEXT,
+    score REAL,
+    pinned INTEGER NOT NULL DEFAULT 0,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (source, name)
+)
+"""
+
+
+class IdentityStore:
+    def __init__(self, path='.player_ids.sqlite'):
+        self.path = path
+        with closing(self._connect()) as conn, conn:
+            conn.execute(SCHEMA)
+
+    @classmethod
+    def from_env(cls):
+        store = cls(os.environ.get('PLAYER_ID_DB', '.player_ids.sqlite'))
+        pins_path = os.environ.get('PLAYER_ID_PINS', os.path.join(os.path.dirname(__file__), 'player_pins.json'))
+        if os.path.exists(pins_path):
+            store.load_pins(pins_path)
+        return store
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    def lookup(self, source, names):
+        """Return {name: target} for every name the store knows. Pinned non-matches map to None."""
+        names = list(dict.fromkeys(names))
+        known = {}
+        with closing(self._connect()) as conn:
+            # Stay under SQLite's bound-parameter limit on big name lists
+            for start in range(0, len(names), 500):
+                chunk = names[start:start + 500]
+                placeholders = ','.join('?' * len(chunk))
+                rows = conn.execute(
+                    f"SELECT name, target FROM matches WHERE source = ? AND name IN ({placeholders})",
+                    [source] + chunk,
+                )
+                known.update(rows)
+        return known
+
+    def record(self, source, matches):
+        """Save new matches, given as {name: (target, score)}. Pinned entries are left alone."""
+        now = time.time()
+        with closing(self._connect()) as conn, conn:
+            conn.executemany(
+                """
+                INSERT INTO matches (source, name, target, score, pinned, updated_at) VALUES (?, ?, ?, ?, 0, ?)
+                ON CONFLICT (source, name) DO UPDATE SET target = excluded.target, score = excluded.score,
+                    updated_at = excluded.updated_at
+                WHERE pinned = 0
+                """,
+                [(source, name, target, score, now) for name, (target, score) in matches.items()],
+            )
+
+    def pin(self, source, name, target):
+        """Force `name` to match `target` (or never match, if target is None)."""
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                """
+                INSERT INTO matches (source, name, target, score, pinned, updated_at) VALUES (?, ?, ?, NULL, 1, ?)
+                ON CONFLICT (source, name) DO UPDATE SET target = excluded.target, score = NULL, pinned = 1,
+                    updated_at = excluded.updated_at
+                """,
+                (source, name, target, time.time()),
+            )
+
+    def forget(self, source, name):
+        """Drop a stored or pinned match so the name gets matched afresh."""
+        with closing(self._connect()) as conn, conn:
+            conn.execute("DELETE FROM matches WHERE source = ? AND name = ?", (source, name))
+
+    def load_pins(self, path):
+        with open(path) as f:
+            pins = json.load(f)
+        for source, names in pins.items():
+            for name, target in names.items():
+                self.pin(source, name, target)
+
+    def entries(self, source):
+        with closing(self._connect()) as conn:
+            return conn.execute(
+                "SELECT name, target, score, pinned FROM matches WHERE source = ? ORDER BY name", (source,)
+            ).fetchall()
+
+    def resolve(self, source, names, candidates, matcher):
+        """
+        Resolve names against today's candidates, matching only names never seen before.
+
+        Args:
+            source: Namespace of the candidate names, e.g. 'espn'.
+            names: Names to resolve.
+            candidates: Names available this run.
+            matcher: Function (unknown_names, remaining_candidates) -> {name: (candidate, score)}
+                used for names the store does not know yet.
+
+        Returns:
+            A dictionary mapping resolved names to their candidate. A known
+            player whose stored name is not among today's candidates (e.g. he
+            is no longer a free agent) stays unresolved.
+        """
+        known = self.lookup(source, names)
+        available = set(candidates)
+        resolved = {name: target for name, target in known.items() if target is not None and target in available}
+
+        unknown = [name for name in dict.fromkeys(names) if name not in known]
+        if unknown:
+            claimed = set(resolved.values())
+            remaining = [candidate for candidate in candidates if candidate not in claimed]
+            new_matches = matcher(unknown, remaining)
+            self.record(source, new_matches)
+            resolved.update((name, target) for name, (target, _) in new_matches.items())
+
+        return resolved
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Inspect and override stored player matches.")
+    parser.add_argument('--db', default=os.environ.get('PLAYER_ID_DB', '.player_ids.sqlite'))
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    list_parser = commands.add_parser('list', help="show stored matches for a source")
+    list_parser.add_argument('source')
+
+    pin_parser = commands.add_parser('pin', help="force a name to match a target")
+    pin_parser.add_argument('source')
+    pin_parser.add_argument('name')
+    pin_parser.add_argument('target', nargs='?')
+    pin_parser.add_argument('--none', action='store_true', help="pin the name to never match")
+
+    forget_parser = commands.add_parser('forget', help="drop a stored match")
+    forget_parser.add_argument('source')
+    forget_parser.add_argument('name')
+
+    args = parser.parse_args(argv)
+    store = IdentityStore(args.db)
+
+    if args.command == 'list':
+        for name, target, score, pinned in store.entries(args.source):
+            label = 'pinned' if pinned else f"{score:.0f}"
+            print(f"{name} -> {target} ({label})")
+    elif args.command == 'pin':
+        if args.target is None and not args.none:
+            parser.error("pin needs a target, or --none")
+        store.pin(args.source, args.name, None if args.none else args.target)
+    elif args.command == 'forget':
+        store.forget(args.source, args.name)
+
+
+if __name__ == '__main__':
+    main()
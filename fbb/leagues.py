@@ -0,0 +1,73 @@
+"""
+League configuration for running the pitcher pipeline for several leagues at once.
+
+The leagues are a JSON list, read from a file (--leagues, or FBB_LEAGUES_FILE)
+or from the SECRET_FBB_LEAGUES environment variable:
+
+    [
+        {"name": "Home", "league_id": 123456, "season": 2025, "sheet_name": "Home"},
+        {"name": "Work", "league_id": 654321, "sheet_name": "Work", "sheet_id": "1AbC..."}
+    ]
+
+Only league_id is required. season defaults to the pipeline's season,
+sheet_id to SECRET_GOOGLE_SPREADSHEET_ID, sheet_name to the league's name, and
+espn_s2/swid to the SECRET_ESPN_S2_COOKIE/SECRET_SWID cookies (one ESPN
+account usually belongs to every league).
+"""
+import json
+import os
+from collections import namedtuple
+
+# name is None for the single league configured by SECRET_LEAGUE_ID
+LeagueConfig = namedtuple('LeagueConfig', ['name', 'league_id', 'season', 'sheet_id', 'sheet_name', 'espn_s2', 'swid'])
+
+
+def parse_leagues(entries, season, sheet_id=None, espn_s2=None, swid=None):
+    """
+    Turn the JSON league entries into LeagueConfigs, filling in the defaults.
+
+    Raises:
+        ValueError: An entry has no league_id, or two leagues share a name or output tab.
+    """
+    leagues = []
+    for index, entry in enumerate(entries):
+        if 'league_id' not in entry:
+            raise ValueError(f"League {index + 1} has no league_id")
+        name = str(entry.get('name') or entry['league_id'])
+        leagues.append(LeagueConfig(
+            name=name,
+            league_id=entry['league_id'],
+            season=int(entry.get('season') or season),
+            sheet_id=entry.get('sheet_id') or sheet_id,
+            sheet_name=entry.get('sheet_name') or name,
+            espn_s2=entry.get('espn_s2') or espn_s2,
+            swid=entry.get('swid') or swid,
+        ))
+
+    names = [league.name for league in leagues]
+    tabs = [(league.sheet_id, league.sheet_name) for league in leagues]
+    if len(set(names)) < len(names):
+        raise ValueError("League names must be unique")
+    if len(set(tabs)) < len(tabs):
+        raise ValueError("Every league needs its own output tab")
+    return leagues
+
+
+def load_leagues(path=None, **defaults):
+    """
+    Read the configured leagues from `path`, FBB_LEAGUES_FILE or SECRET_FBB_LEAGUES.
+
+    Keyword arguments are the defaults passed to parse_leagues.
+
+    Returns:
+        A list of LeagueConfigs, or None if no leagues are configured.
+    """
+    path = path or os.environ.get('FBB_LEAGUES_FILE')
+    if path:
+        with open(path) as f:
+            entries = json.load(f)
+    elif os.environ.get('SECRET_FBB_LEAGUES'):
+        entries = json.loads(os.environ['SECRET_FBB_LEAGUES'])
+    else:
+        return None
+    return parse_leagues(entries, **defaults)
@@ -0,0 +1,154 @@
+"""
+Name matching between the different player sources (Pitcher List, ESPN, Eno sheet).
+"""
+import re
+import unicodedata
+
+import numpy as np
+from rapidfuzz import process, fuzz
+
+import metrics
+
+SUFFIXES = {'jr', 'sr', 'ii', 'iii', 'iv'}
+
+def normalize_name(name):
+    """
+    Reduce a player name to a canonical form for matching.
+
+    Strips accents, case, punctuation and generational suffixes, and joins
+    initials, so 'José Berríos', 'J.P. France' and 'Luis García Jr.' become
+    'jose berrios', 'jp france' and 'luis garcia'.
+    """
+    if not isinstance(name, str):
+        return ''
+    name = unicodedata.normalize('NFKD', name)
+    name = ''.join(char for char in name if not unicodedata.combining(char))
+    name = name.lower().replace('.', ' ').replace("'", '').replace('’', '')
+
+    tokens = re.findall(r'[a-z0-9]+', name)
+    if len(tokens) > 1:
+        tokens = [tokens[0]] + [token for token in tokens[1:] if token not in SUFFIXES]
+
+    # Join runs of single-letter initials: 'j p france' -> 'jp france'
+    merged = []
+    in_initials = False
+    for token in tokens:
+        if len(token) == 1 and in_initials:
+            merged[-1] += token
+        else:
+            merged.append(token)
+            in_initials = len(token) == 1
+    return ' '.join(merged)
+
+def match_names(queries, choices, threshold=85, with_scores=False):
+    """
+    Match each choice to the query that fits it best, using one score matrix.
+
+    Every query is paired with its highest scoring choice (an exact match
+    always scores 100). When several queries land on the same choice, only
+    the highest scoring one keeps it, so each choice gets its best match.
+
+    Args:
+        queries: Names to look up, e.g. ESPN free agents.
+        choices: Names to match against, e.g. ranked pitchers.
+        threshold: Minimum fuzz.ratio score for a match.
+        with_scores: Return (query, score) tuples instead of bare queries.
+
+    Returns:
+        A dictionary mapping matched choices to their query.
+    """
+    if not queries or not choices:
+        return {}
+
+    # Scores for every (query, choice) pair, computed on all cores
+    metrics.count('fuzzy_comparisons', len(queries) * len(choices))
+    scores = process.cdist(queries, choices, scorer=fuzz.ratio, score_cutoff=threshold, workers=-1)
+    best_choice = scores.argmax(axis=1)
+    best_score = scores[np.arange(len(queries)), best_choice]
+
+    matched = np.flatnonzero(best_score >= threshold)
+    # Highest score first; ties keep query order, so the earlier query wins
+    matched = matched[np.argsort(-best_score[matched], kind='stable')]
+
+    matches = {}
+    for query_index in matched:
+        choice = choices[best_choice[query_index]]
+        if choice not in matches:
+            query = queries[query_index]
+            matches[choice] = (query, float(best_score[query_index])) if with_scores else query
+    return matches
+
+def resolve_names(names, candidates, threshold=85, with_scores=False):
+    """
+    Find the best candidate for each name: exact normalized match first, fuzzy for the rest.
+
+    Args:
+        names: Names to resolve. Duplicates are only scored once.
+        candidates: Names to resolve them against.
+        threshold: Minimum fuzz.ratio score (on normalized names) for a fuzzy match.
+        with_scores: Return (candidate, score) tuples instead of bare candidates.
+
+    Returns:
+        A dictionary mapping each resolved name to its candidate. Several names
+        may resolve to the same candidate.
+    """
+    # Normalize every distinct name once; the first candidate with a given key wins
+    candidate_by_key = {}
+    for candidate in candidates:
+        candidate_by_key.setdefault(normalize_name(candidate), candidate)
+    candidate_by_key.pop('', None)
+
+    resolved = {}
+    leftovers = []
+    for name in dict.fromkeys(names):
+        key = normalize_name(name)
+        if key in candidate_by_key:
+            resolved[name] = (candidate_by_key[key], 100.0)
+        elif key:
+            leftovers.append((name, key))
+
+    if leftovers and candidate_by_key:
+        candidate_keys = list(candidate_by_key)
+        metrics.count('fuzzy_comparisons', len(leftovers) * len(candidate_keys))
+        scores = process.cdist([key for _, key in leftovers], candidate_keys,
+                               scorer=fuzz.ratio, score_cutoff=threshold, workers=-1)
+        best = scores.argmax(axis=1)
+        best_score = scores[np.arange(len(leftovers)), best]
+        for (name, _), index, score in zip(leftovers, best, best_score):
+            if score >= threshold:
+                resolved[name] = (candidate_by_key[candidate_keys[index]], float(score))
+
+    if not with_scores:
+        return {name: candidate for name, (candidate, _) in resolved.items()}
+    return resolved
+
+def fuzzy_join(left, right, left_on, right_on, threshold=85, store=None, source=None):
+    """
+    Left-join `right` onto `left` by player name, tolerating spelling differences.
+
+    Args:
+        left: DataFrame to add columns to.
+        right: DataFrame with the columns to bring in, including `right_on`.
+        left_on: Name column in `left`.
+        right_on: Name column in `right`.
+        threshold: Minimum fuzzy score for names without an exact normalized match.
+        store: Optional IdentityStore; names it already knows skip matching.
+        source: Namespace of `right_on` names in the store, e.g. 'eno'.
+
+    Returns:
+        `left` with every column of `right` joined on; unmatched rows get NaN.
+    """
+    names = left[left_on].tolist()
+    candidates = right[right_on].tolist()
+    if store is not None:
+        resolved = store.resolve(source, names, candidates, lambda unknown, remaining: resolve_names(
+            unknown, remaining, threshold=threshold, with_scores=True))
+    else:
+        resolved = resolve_names(names, candidates, threshold=threshold)
+
+    # One row per name (the first, as a name lookup would find it), then a single join
+    right = right.drop_duplicates(subset=right_on).set_index(right_on, drop=False)
+    left = left.drop(columns=[column for column in right.columns if column in left.columns and column != left_on])
+
+    keys = left[left_on].map(resolved)
+    return left.assign(_match_key=keys).join(right, on='_match_key', rsuffix='_right').drop(columns='_match_key')
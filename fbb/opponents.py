@@ -0,0 +1,258 @@
+"""
+Opponent strength: how every MLB offense ranks on several stats, as one
+team x stat matrix the pipeline joins onto the rankings in a single step.
+
+    Runs, OPS (season, home, away)   teamrankings.com stat pages
+    K%, wOBA vs RHP / vs LHP         FanGraphs team batting leaderboards
+
+All pages are fetched at the same time through the HTTP cache. Team names
+from every source, and the Opponent abbreviations from Pitcher List, are
+resolved through one normalized index, so 'Chi Sox', 'CHW' and 'CWS' are the
+same team. Rank 1 is always the toughest offense to pitch against: most runs,
+highest OPS and wOBA, lowest strikeout rate.
+"""
+import hashlib
+import re
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from urllib.parse import urlencode
+
+import pandas as pd
+import requests
+
+import metrics
+from http_cache import cached_get, fingerprint
+from parsing import xpath_has_class
+
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+}
+TEAMRANKINGS_URL = 'https://www.teamrankings.com/mlb/stat/{slug}'
+FANGRAPHS_URL = 'https://www.fangraphs.com/api/leaders/major-league/data'
+
+# Canonical team code: other names and abbreviations used by the sources
+TEAMS = {
+    'ARI': ['Arizona', 'Arizona Diamondbacks', 'Diamondbacks', 'AZ'],
+    'ATL': ['Atlanta', 'Atlanta Braves', 'Braves'],
+    'BAL': ['Baltimore', 'Baltimore Orioles', 'Orioles'],
+    'BOS': ['Boston', 'Boston Red Sox', 'Red Sox'],
+    'CHC': ['Chicago Cubs', 'Chi Cubs', 'Cubs'],
+    'CWS': ['Chicago White Sox', 'Chi Sox', 'Chi White Sox', 'White Sox', 'CHW'],
+    'CIN': ['Cincinnati', 'Cincinnati Reds', 'Reds'],
+    'CLE': ['Cleveland', 'Cleveland Guardians', 'Guardians'],
+    'COL': ['Colorado', 'Colorado Rockies', 'Rockies'],
+    'DET': ['Detroit', 'Detroit Tigers', 'Tigers'],
+    'HOU': ['Houston', 'Houston Astros', 'Astros'],
+    'KCR': ['Kansas City', 'Kansas City Royals', 'Royals', 'KC'],
+    'LAA': ['LA Angels', 'Los Angeles Angels', 'Angels', 'ANA'],
+    'LAD': ['LA Dodgers', 'Los Angeles Dodgers', 'Dodgers'],
+    'MIA': ['Miami', 'Miami Marlins', 'Marlins', 'FLA'],
+    'MIL': ['Milwaukee', 'Milwaukee Brewers', 'Brewers'],
+    'MIN': ['Minnesota', 'Minnesota Twins', 'Twins'],
+    'NYM': ['NY Mets', 'New York Mets', 'Mets'],
+    'NYY': ['NY Yankees', 'New York Yankees', 'Yankees'],
+    'ATH': ['Sacramento', 'Athletics', 'Oakland', 'Oakland Athletics', 'OAK'],
+    'PHI': ['Philadelphia', 'Philadelphia Phillies', 'Phillies'],
+    'PIT': ['Pittsburgh', 'Pittsburgh Pirates', 'Pirates'],
+    'SDP': ['San Diego', 'San Diego Padres', 'Padres', 'SD'],
+    'SFG': ['SF Giants', 'San Francisco', 'San Francisco Giants', 'Giants', 'SF'],
+    'SEA': ['Seattle', 'Seattle Mariners', 'Mariners'],
+    'STL': ['St. Louis', 'St. Louis Cardinals', 'Cardinals'],
+    'TBR': ['Tampa Bay', 'Tampa Bay Rays', 'Rays', 'TB'],
+    'TEX': ['Texas', 'Texas Rangers', 'Rangers'],
+    'TOR': ['Toronto', 'Toronto Blue Jays', 'Blue Jays'],
+    'WSN': ['Washington', 'Washington Nationals', 'Nationals', 'WSH', 'WAS'],
+}
+
+# Matrix column: (source, page, field, higher is tougher)
+# teamrankings pages are stat slugs with 'season', 'Home' and 'Away' fields;
+# FanGraphs pages are leaderboard split codes (0 season, 13 vs LHP, 14 vs RHP).
+STATS = {
+    'Runs': ('teamrankings', 'runs-per-game', 'season', True),
+    'Runs Home': ('teamrankings', 'runs-per-game', 'Home', True),
+    'Runs Away': ('teamrankings', 'runs-per-game', 'Away', True),
+    'OPS': ('teamrankings', 'on-base-plus-slugging-pct', 'season', True),
+    'OPS Home': ('teamrankings', 'on-base-plus-slugging-pct', 'Home', True),
+    'OPS Away': ('teamrankings', 'on-base-plus-slugging-pct', 'Away', True),
+    'K%': ('fangraphs', 0, 'K%', False),
+    'wOBA vs RHP': ('fangraphs', 14, 'wOBA', True),
+    'wOBA vs LHP': ('fangraphs', 13, 'wOBA', True),
+}
+
+_APOSTROPHES = re.compile(r"['.]")
+_SEPARATORS = re.compile(r'[^a-z0-9]+')
+_TAGS = re.compile(r'<[^>]+>')
+
+
+def normalize_team_name(name):
+    """Lowercase, drop periods and apostrophes, and collapse everything else to single spaces."""
+    return _SEPARATORS.sub(' ', _APOSTROPHES.sub('', str(name).lower())).strip()
+
+
+# Every normalized name or abbreviation -> canonical code, built once
+TEAM_INDEX = {
+    normalize_team_name(name): code
+    for code, names in TEAMS.items()
+    for name in [code, *names]
+}
+
+
+def team_code(name):
+    """The canonical code for a team name or abbreviation, or None if it is unknown."""
+    return TEAM_INDEX.get(normalize_team_name(name))
+
+
+def team_codes(names):
+    """team_code() for a whole Series at once; unknown names become NaN."""
+    normalized = (names.astype('string').str.lower()
+                  .str.replace(_APOSTROPHES.pattern, '', regex=True)
+                  .str.replace(_SEPARATORS.pattern, ' ', regex=True)
+                  .str.strip())
+    return normalized.map(TEAM_INDEX)
+
+
+def parse_teamrankings(html_content):
+    """
+    Parse a teamrankings.com stat page.
+
+    Returns:
+        A DataFrame indexed by team code with 'season', 'Home' and 'Away' columns.
+    """
+    import lxml.html
+
+    document = lxml.html.document_fromstring(html_content)
+    tables = document.xpath(f"//table[{xpath_has_class('datatable')}]")
+    if not tables:
+        raise ValueError("No stat table found")
+
+    headers = [th.text_content().strip() for th in tables[0].xpath('./thead//th')]
+    # Rank, Team, then the current season's value; the splits are named
+    columns = {'season': 2}
+    for split in ('Home', 'Away'):
+        if split in headers:
+            columns[split] = headers.index(split)
+
+    rows = {}
+    for tr in tables[0].xpath('./tbody/tr'):
+        cells = [td.text_content().strip() for td in tr.xpath('./td')]
+        if len(cells) < 3:
+            continue
+        code = team_code(cells[1])
+        if code is None:
+            print(f"Unknown team '{cells[1]}'")
+            continue
+        rows[code] = {field: cells[index] if index < len(cells) else None for field, index in columns.items()}
+    return _numeric(pd.DataFrame.from_dict(rows, orient='index'))
+
+
+def parse_fangraphs(payload):
+    """
+    Parse a FanGraphs team leaderboard response.
+
+    Returns:
+        A DataFrame indexed by team code with one column per stat.
+    """
+    rows = {}
+    for row in payload.get('data', []):
+        name = row.get('TeamNameAbb') or row.get('TeamName') or _TAGS.sub('', str(row.get('Team', '')))
+        code = team_code(name)
+        if code is None:
+            print(f"Unknown team '{name}'")
+            continue
+        rows[code] = row
+    return _numeric(pd.DataFrame.from_dict(rows, orient='index'))
+
+
+def _numeric(frame):
+    return frame.apply(lambda column: pd.to_numeric(column.astype('string').str.rstrip('%'), errors='coerce'))
+
+
+def page_url(source, page, season):
+    """The URL of one source page (a STATS source and page) for `season`."""
+    if source == 'teamrankings':
+        return TEAMRANKINGS_URL.format(slug=page)
+    params = {
+        'pos': 'all', 'stats': 'bat', 'lg': 'all', 'qual': 0, 'season': season, 'season1': season,
+        'month': page, 'team': '0,ts', 'ind': 0, 'pageitems': 30, 'pagenum': 1, 'type': 8,
+    }
+    return f"{FANGRAPHS_URL}?{urlencode(params)}"
+
+
+def source_pages(columns=None):
+    """The (source, page) pairs the STATS columns are read from, each once."""
+    return sorted({STATS[column][:2] for column in columns or STATS}, key=str)
+
+
+def revision(seasons, columns=None):
+    """
+    One digest of every source page behind the rank matrix for `seasons`.
+
+    Each page is revalidated through the HTTP cache (a 304 costs no body), and
+    the refreshed copies are what opponent_rank_matrix() parses next.
+    """
+    # teamrankings pages are the same URL for every season
+    urls = sorted({page_url(source, page, season) for season in seasons for source, page in source_pages(columns)})
+    digests = [fingerprint(url, headers=HEADERS) for url in urls]
+    return hashlib.sha256(''.join(digests).encode()).hexdigest()
+
+
+def fetch_page(source, page, season):
+    """Fetch and parse one source page (through the HTTP cache)."""
+    response = cached_get(page_url(source, page, season), headers=HEADERS)
+    response.raise_for_status()
+    if source == 'teamrankings':
+        return parse_teamrankings(response.content)
+    return parse_fangraphs(response.json())
+
+
+def fetch_opponent_stats(columns=None, season=None):
+    """
+    Fetch the raw values behind the rank matrix, every source page at the same time.
+
+    A page that cannot be fetched or parsed is reported and its columns are left empty.
+
+    Args:
+        columns: Which STATS columns to fetch (default: all).
+        season: Season for the FanGraphs splits (default: this year).
+
+    Returns:
+        A DataFrame indexed by team code (all 30 teams) with one column per stat.
+    """
+    columns = list(columns or STATS)
+    season = season or date.today().year
+    pages = source_pages(columns)
+
+    def fetch(source_page):
+        source, page = source_page
+        try:
+            return fetch_page(source, page, season)
+        except (requests.exceptions.RequestException, ValueError) as e:
+            print(f"Could not fetch {source} {page}: {e}")
+            return None
+
+    with ThreadPoolExecutor(max_workers=len(pages) or 1) as executor:
+        frames = dict(zip(pages, executor.map(metrics.propagate(fetch), pages)))
+
+    values = pd.DataFrame(index=sorted(TEAMS), columns=columns, dtype='float64')
+    for column in columns:
+        source, page, field, _ = STATS[column]
+        frame = frames[(source, page)]
+        if frame is not None and field in frame:
+            values[column] = frame[field].reindex(values.index)
+    return values
+
+
+def opponent_rank_matrix(columns=None, season=None):
+    """
+    Rank every team's offense on each stat.
+
+    Returns:
+        A DataFrame indexed by team code with one nullable integer column of
+        ranks per stat (1 = toughest opponent; tied values share a rank).
+    """
+    values = fetch_opponent_stats(columns, season)
+    ranks = pd.DataFrame(index=values.index)
+    for column in values.columns:
+        higher_is_tougher = STATS[column][3]
+        ranks[column] = values[column].rank(ascending=not higher_is_tougher, method='min').astype('Int64')
+    return ranks
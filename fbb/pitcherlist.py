@@ -0,0 +1,151 @@
+"""
+Pitcher List WordPress API queries.
+
+The latest streamer post is found with a server-side title search that returns
+only a few small fields; the rendered content is then requested for that one
+post. The last post downloaded is kept in the HTTP cache directory, and when
+its `modified` timestamp has not changed since then the saved copy is reused
+instead of downloading the content again.
+
+iter_streamer_posts() pages through every past streamer post, holding one page
+in memory at a time, for season-long analysis.
+"""
+import json
+import os
+from urllib.parse import urlencode
+
+from http_cache import cached_get, get_cache
+from transport import get_transport
+
+POSTS_URL = 'https://pitcherlist.com/wp-json/wp/v2/posts'
+STREAMER_TITLE = 'Starting Pitcher Streamer Rankings'
+
+# Fields used to pick a post, and the ones needed to parse it
+LISTING_FIELDS = 'id,date,modified,title,link'
+POST_FIELDS = LISTING_FIELDS + ',content'
+
+
+def posts_url(**params):
+    return f"{POSTS_URL}?{urlencode(params)}"
+
+
+def is_streamer_post(post):
+    return STREAMER_TITLE in post['title']['rendered']
+
+
+def search_params(**params):
+    """Query parameters for a newest-first title search for streamer posts."""
+    return dict(search=STREAMER_TITLE, search_columns='post_title', orderby='date', order='desc', **params)
+
+
+def find_streamer_posts(per_page=5, ttl=None):
+    """
+    The newest streamer posts, with listing fields only (no content).
+
+    Falls back to scanning the 20 most recent posts if the search finds nothing.
+
+    Args:
+        per_page: How many posts the search returns.
+        ttl: Seconds a cached listing is used as is (default: the host's TTL).
+    """
+    response = cached_get(posts_url(**search_params(per_page=per_page, _fields=LISTING_FIELDS)), ttl=ttl)
+    response.raise_for_status()
+    posts = [post for post in response.json() if is_streamer_post(post)]
+    if posts:
+        return posts
+
+    response = cached_get(posts_url(per_page=20, _fields=LISTING_FIELDS), ttl=ttl)
+    response.raise_for_status()
+    return [post for post in response.json() if is_streamer_post(post)]
+
+
+def latest_revision():
+    """
+    The latest streamer post's id and `modified` time, from a fresh listing (a few hundred bytes).
+
+    The listing is left in the HTTP cache, so a fetch right after uses it.
+    """
+    posts = find_streamer_posts(ttl=0)
+    return f"{posts[0]['id']}@{posts[0]['modified']}" if posts else ''
+
+
+def saved_post_path():
+    return os.environ.get('PITCHERLIST_STATE', os.path.join(get_cache().directory, 'streamer_post.json'))
+
+
+def load_saved_post(path=None):
+    try:
+        with open(path or saved_post_path()) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def save_post(post, path=None):
+    path = path or saved_post_path()
+    temp_path = f"{path}.tmp"
+    with open(temp_path, 'w') as f:
+        json.dump(post, f)
+    os.replace(temp_path, path)
+
+
+def fetch_latest_streamer_post(listing=None):
+    """
+    Return the latest streamer post with its rendered content.
+
+    Args:
+        listing: The post's listing fields from find_streamer_posts(), if already fetched.
+
+    Returns:
+        The post as a dictionary with LISTING_FIELDS and 'content'.
+    """
+    if listing is None:
+        posts = find_streamer_posts()
+        if not posts:
+            raise ValueError("No Starting Pitcher Rankings post found!")
+        listing = posts[0]
+
+    saved = load_saved_post()
+    if saved and saved['id'] == listing['id'] and saved['modified'] == listing['modified']:
+        print(f"Post {listing['id']} unchanged since {listing['modified']}, using the saved copy")
+        return saved
+
+    # ttl=0: the post changed, so never serve an older cached copy (offline mode still can)
+    response = cached_get(f"{POSTS_URL}/{listing['id']}?{urlencode({'_fields': POST_FIELDS})}", ttl=0)
+    response.raise_for_status()
+    post = response.json()
+    save_post(post)
+    return post
+
+
+def iter_streamer_posts(after=None, before=None, per_page=20, fields=POST_FIELDS):
+    """
+    Yield every streamer post, newest first, requesting one page at a time.
+
+    Args:
+        after: Only posts published after this ISO 8601 date-time, e.g. '2025-03-01T00:00:00'.
+        before: Only posts published before this ISO 8601 date-time.
+        per_page: Posts per request (WordPress allows up to 100).
+        fields: Comma-separated `_fields` to request.
+    """
+    page = 1
+    while True:
+        params = search_params(per_page=per_page, page=page, _fields=fields)
+        if after:
+            params['after'] = after
+        if before:
+            params['before'] = before
+
+        response = get_transport().get(POSTS_URL, params=params)
+        # WordPress answers 400 (rest_post_invalid_page_number) for a page past the end
+        if response.status_code == 400 and page > 1:
+            return
+        response.raise_for_status()
+
+        for post in response.json():
+            if is_streamer_post(post):
+                yield post
+
+        if page >= int(response.headers.get('X-WP-TotalPages', page)):
+            return
+        page += 1
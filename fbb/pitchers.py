@@ -1,104 +1,307 @@
-import requests
-from bs4 import BeautifulSoup
 import pandas as pd
 import re
-from rapidfuzz import process, fuzz  # Import fuzz separately
-from espn_api.baseball import League
-import gspread
-from oauth2client.service_account import ServiceAccountCredentials
-import os
+import argparse
+import hashlib
 import json
+import os
+import time
+
+import metrics
+from history import HistoryStore
+from parsing import DEFAULT_PARSER
+from sheets import get_or_create_worksheet, read_frame, read_many, sync_worksheet, write_worksheet
+from sheets import revision as sheet_revision
+from fbb.espn_pool import FreeAgentPool, fetch_free_agents
+from fbb.identity import IdentityStore
+from fbb.leagues import LeagueConfig, load_leagues
+from fbb.matching import fuzzy_join, match_names
+from fbb.opponents import opponent_rank_matrix, team_codes
+from fbb.opponents import revision as opponent_revision
+from fbb.pitcherlist import fetch_latest_streamer_post, iter_streamer_posts, latest_revision
+from pipeline import Stage, run_stages
+from transport import get_transport
+from watch import Signal, watch
+
+@metrics.measured()
+def extract_pitcher_rankings(post=None):
+    """
+    Extracts the latest Starting Pitcher Streamer Rankings from Pitcher List's WordPress API.
+
+    Args:
+        post: A post dictionary with rendered content (e.g. from iter_streamer_posts);
+            defaults to the latest streamer post.
 
-def extract_pitcher_rankings():
+    Returns:
+        (df, rankings): the rankings as a DataFrame and as a list of dictionaries.
     """
-    Extracts the latest Starting Pitcher Streamer Rankings from Pitcher List's WordPress API,
-    matches them with ESPN Fantasy Baseball players, and exports the data to a Google Sheet.
+    # Step 1-2: Find the latest post with a trimmed server-side search, then fetch only its content
+    target_post = post or fetch_latest_streamer_post()
+
+    # Step 3-4: Parse the content
+    rankings = parse_streamer_rankings(target_post['content']['rendered'])
+
+    # Step 5: Output
+    df = pd.DataFrame(rankings)
+
+    print(f"Post Title: {target_post['title']['rendered']}")
+    print(f"Post URL: {target_post['link']}")
+
+    return df, rankings
+
+# Precompiled patterns for parse_streamer_rankings
+RANKINGS_START = re.compile(r"Starting Pitcher Streamer Rankings", re.I)
+OPPONENT = re.compile(r'vs\. ([A-Z]+)|@ ([A-Z]+)')
+
+# Tier headings, checked in this order
+TIER_KEYWORDS = [
+    (re.compile(r"Auto-Starts", re.I), "Auto-Start"),
+    (re.compile(r"Probably Starts", re.I), "Probably Start"),
+    (re.compile(r"Questionable Starts", re.I), "Questionable Start"),
+    (re.compile(r"Do Not Starts", re.I), "Do Not Start"),
+]
+# Most paragraphs are not headings, so one search rules them all out at once
+ANY_TIER = re.compile("|".join(pattern.pattern for pattern, _ in TIER_KEYWORDS), re.I)
+ENTITY_REFERENCE = re.compile(r'&([A-Za-z][A-Za-z0-9]*)(;?)')
+PARAGRAPH_OPEN = re.compile(r'<p[\s/>]', re.I)
+PARAGRAPH_CLOSE = re.compile(r'</p\s*>', re.I)
+# Start tags that make an HTML parser like lxml's close an open <p> (BeautifulSoup keeps them inside it)
+CLOSES_PARAGRAPH = re.compile(
+    r'<(?:address|article|aside|blockquote|center|dd|details|dialog|dir|div|dl|dt|fieldset|figcaption|figure|'
+    r'footer|form|h[1-6]|header|hgroup|hr|li|listing|main|menu|nav|ol|p|plaintext|pre|section|summary|table|'
+    r'ul|xmp)[\s/>]', re.I)
+ASCII_SPACES = ' \t\n\x0c\r'
+TAG = re.compile(r'<(/?)([A-Za-z][A-Za-z0-9]*)\b[^>]*>')
+UNPARSED = re.compile(r'<!--.*?-->|<(script|style)\b.*?</\1\s*>', re.I | re.S)
+VOID_ELEMENTS = {'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'link', 'meta', 'source', 'track', 'wbr'}
+INLINE_ELEMENTS = {'a', 'abbr', 'b', 'bdi', 'bdo', 'big', 'cite', 'code', 'data', 'dfn', 'em', 'font', 'i', 'kbd',
+                   'label', 'mark', 'nobr', 'q', 's', 'samp', 'small', 'span', 'strike', 'strong', 'sub', 'sup',
+                   'time', 'tt', 'u', 'var'}
+
+def _read_paragraph(p_tag, tag_class):
     """
+    Walk a paragraph once, collecting what the rankings need.
 
-    # Step 1: Access the WordPress API
-    url = 'https://pitcherlist.com/wp-json/wp/v2/posts?per_page=20'
-    response = requests.get(url)
-    response.raise_for_status()
-    posts = response.json()
+    Args:
+        p_tag: The paragraph.
+        tag_class: bs4's Tag class (bs4 is imported lazily by the caller).
 
-    # Step 2: Find the latest Starting Pitcher Rankings post
-    target_post = None
-    for post in posts:
-        title = post['title']['rendered']
-        if "Starting Pitcher Streamer Rankings" in title:
-            target_post = post
-            break
+    Returns:
+        (strings, strong_strings, link_strings): the paragraph's strings, those
+        of its first <strong>, and those of the first player-tag link inside
+        that <strong> (None when there is no such tag).
+    """
+    # Same strings get_text() would use
+    string_types = p_tag.interesting_string_types
+    strings = []
+    strong_strings = None
+    link_strings = None
+
+    def walk(tag, in_strong, in_link):
+        nonlocal strong_strings, link_strings
+        for child in tag.contents:
+            if type(child) in string_types:
+                strings.append(child)
+                if in_strong:
+                    strong_strings.append(child)
+                if in_link:
+                    link_strings.append(child)
+            elif isinstance(child, tag_class):
+                child_in_strong, child_in_link = in_strong, in_link
+                if strong_strings is None and child.name == 'strong':
+                    strong_strings = []
+                    child_in_strong = True
+                elif in_strong and link_strings is None and child.name == 'a' \
+                        and 'player-tag' in child.get('class', ()):
+                    link_strings = []
+                    child_in_link = True
+                walk(child, child_in_strong, child_in_link)
+
+    walk(p_tag, False, False)
+    return strings, strong_strings, link_strings
+
+def _read_paragraph_lxml(p_element):
+    """The same walk as _read_paragraph, over an lxml element (text and tails instead of string nodes)."""
+    strings = []
+    strong_strings = None
+    link_strings = None
+
+    def add(text, in_strong, in_link):
+        # BeautifulSoup collapses whitespace-only strings to one newline or space
+        if not text.strip(ASCII_SPACES):
+            text = '\n' if '\n' in text else ' '
+        strings.append(text)
+        if in_strong:
+            strong_strings.append(text)
+        if in_link:
+            link_strings.append(text)
+
+    def walk(element, in_strong, in_link):
+        nonlocal strong_strings, link_strings
+        # BeautifulSoup leaves script and style contents out of get_text()
+        if element.text and element.tag not in ('script', 'style'):
+            add(element.text, in_strong, in_link)
+        for child in element:
+            # Comments and processing instructions have no text of their own, only a tail
+            if isinstance(child.tag, str):
+                child_in_strong, child_in_link = in_strong, in_link
+                if strong_strings is None and child.tag == 'strong':
+                    strong_strings = []
+                    child_in_strong = True
+                elif in_strong and link_strings is None and child.tag == 'a' \
+                        and 'player-tag' in (child.get('class') or '').split():
+                    link_strings = []
+                    child_in_link = True
+                walk(child, child_in_strong, child_in_link)
+            if child.tail:
+                add(child.tail, in_strong, in_link)
+
+    walk(p_element, False, False)
+    return strings, strong_strings, link_strings
+
+def _stripped_text(strings):
+    # get_text(strip=True)
+    return ''.join(stripped for stripped in (string.strip() for string in strings) if stripped)
+
+def _block_inside_paragraph(html_content):
+    """Whether any <p> has a block element or another <p> before its closing tag (or the end of the input)."""
+    for opening in PARAGRAPH_OPEN.finditer(html_content):
+        closing = PARAGRAPH_CLOSE.search(html_content, opening.end())
+        end = closing.start() if closing else len(html_content)
+        if CLOSES_PARAGRAPH.search(html_content, opening.end(), end):
+            return True
+    return False
+
+def _well_nested(html_content):
+    """
+    Whether every end tag closes the element opened last, and no <p> opens inside an inline element.
 
-    if not target_post:
-        raise ValueError("No Starting Pitcher Rankings post found!")
+    When either fails, where a paragraph ends depends on elements outside it,
+    which neither lxml nor a BeautifulSoup tree of only the <p> elements sees
+    the way the original full BeautifulSoup tree does.
+    """
+    open_tags = []
+    for tag in TAG.finditer(UNPARSED.sub('', html_content)):
+        closing, name = tag.group(1), tag.group(2).lower()
+        if name in VOID_ELEMENTS:
+            continue
+        if closing:
+            if not open_tags or open_tags.pop() != name:
+                return False
+        elif name == 'p' and INLINE_ELEMENTS.intersection(open_tags):
+            return False
+        elif not tag.group(0).endswith('/>'):
+            open_tags.append(name)
+    return True
+
+def _lxml_matches_bs4(html_content):
+    """
+    Whether lxml parses this input's paragraphs the same way BeautifulSoup does.
 
-    # Step 3: Parse the content
-    html_content = target_post['content']['rendered']
-    soup = BeautifulSoup(html_content, 'html.parser')
+    It does not for carriage returns (libxml2 normalizes line endings), for
+    unknown and unterminated named references (BeautifulSoup turns '&bogus;' into '&bogus'),
+    or for a block element or nested <p> inside a paragraph (lxml closes the
+    paragraph there, BeautifulSoup keeps the rest of it). The check errs
+    towards bs4: a paragraph it cannot see the end of counts as having a block inside.
+    """
+    from html.entities import html5
+
+    if '\r' in html_content:
+        return False
+    if not all(terminator and f"{name};" in html5 for name, terminator in ENTITY_REFERENCE.findall(html_content)):
+        return False
+    return not _block_inside_paragraph(html_content)
+
+def parse_streamer_rankings(html_content, parser=None):
+    """
+    Parse a streamer post's rendered HTML into a list of ranking dictionaries.
+
+    Each paragraph is walked once. The bs4 backend builds only the <p> elements
+    into its tree, unless the tags are misnested (see _well_nested). Posts the
+    lxml backend would read differently (see _lxml_matches_bs4) go to bs4;
+    bench/streamer_parser.py compares the two on the saved corpus.
+
+    Args:
+        html_content: The post's rendered HTML.
+        parser: 'lxml' or 'bs4'. Defaults to lxml; posts
+            lxml would read differently always use bs4.
+    """
+    parser = parser or DEFAULT_PARSER
+    well_nested = _well_nested(html_content)
+    if parser == 'lxml' and not (well_nested and _lxml_matches_bs4(html_content)):
+        parser = 'bs4'
+
+    if parser == 'lxml':
+        import lxml.etree
+        import lxml.html
+
+        try:
+            document = lxml.html.document_fromstring(html_content)
+        except lxml.etree.ParserError:
+            # Nothing but whitespace, comments or stray end tags: no paragraphs, as with bs4
+            return []
+        paragraphs = (_read_paragraph_lxml(p) for p in document.iter('p'))
+    elif parser == 'bs4':
+        from bs4 import BeautifulSoup, SoupStrainer, Tag
+
+        soup = BeautifulSoup(html_content, 'html.parser', parse_only=SoupStrainer('p') if well_nested else None)
+        paragraphs = (_read_paragraph(p_tag, Tag) for p_tag in soup.find_all('p'))
+    else:
+        raise ValueError(f"Unknown parser '{parser}'. Expected 'lxml' or 'bs4'.")
 
     # Step 4: Extract the rankings with tiers and dates
     rankings = []
     start_collecting = False
     current_tier = None
 
-    # Define tiers to look for
-    tier_keywords = {
-        "Auto-Starts": "Auto-Start",
-        "Probably Starts": "Probably Start",
-        "Questionable Starts": "Questionable Start",
-        "Do Not Starts": "Do Not Start"
-    }
-
-    for p_tag in soup.find_all('p'):
-        text = p_tag.get_text(strip=True)
+    for strings, strong_strings, link_strings in paragraphs:
+        text = _stripped_text(strings)
 
         # Detect when rankings actually start
-        if re.search(r"Starting Pitcher Streamer Rankings", text, re.I):
+        if RANKINGS_START.search(text):
             start_collecting = True
             continue
 
-        if start_collecting:
-            # Check if this paragraph is a tier heading
-            for key in tier_keywords.keys():
-                if re.search(key, text, re.I):
-                    current_tier = tier_keywords[key]
+        if not start_collecting:
+            continue
+
+        # Check if this paragraph is a tier heading
+        if ANY_TIER.search(text):
+            for pattern, tier in TIER_KEYWORDS:
+                if pattern.search(text):
+                    current_tier = tier
                     break
 
-            # Otherwise, look for player entries
-            strong_tag = p_tag.find('strong')
-            if strong_tag:
-                player_link = strong_tag.find('a', class_='player-tag')
-                if player_link:
-                    player_name = player_link.get_text(strip=True)
-
-                    # Find opponent
-                    after_player = strong_tag.get_text()
-                    opponent_match = re.search(r'vs\. ([A-Z]+)|@ ([A-Z]+)', after_player)
-                    if opponent_match:
-                        opponent = opponent_match.group(1) or opponent_match.group(2)
-                    else:
-                        opponent = None
-
-                    # Blurb text (after the strong tag)
-                    blurb = p_tag.get_text().replace(strong_tag.get_text(), '').strip(' –—')
-
-                    # Add the extracted data to the rankings list
-                    rankings.append({
-                        'Tier': current_tier,
-                        'Player': player_name,
-                        'Opponent': opponent,
-                        'Blurb': blurb
-                    })
+        # Otherwise, look for player entries
+        if link_strings is None:
+            continue
 
-    # Step 5: Output
-    df = pd.DataFrame(rankings)
+        # Find opponent
+        strong_text = ''.join(strong_strings)
+        opponent_match = OPPONENT.search(strong_text)
+        if opponent_match:
+            opponent = opponent_match.group(1) or opponent_match.group(2)
+        else:
+            opponent = None
 
-    print(f"Post Title: {target_post['title']['rendered']}")
-    print(f"Post URL: {target_post['link']}")
+        rankings.append({
+            'Tier': current_tier,
+            'Player': _stripped_text(link_strings),
+            'Opponent': opponent,
+            # Blurb text (after the strong tag)
+            'Blurb': ''.join(strings).replace(strong_text, '').strip(' –—'),
+        })
 
-    return df, rankings
+    return rankings
+
+def iter_streamer_rankings(after=None, before=None):
+    """
+    Yield (post, rankings) for every past streamer post, newest first.
 
-df, rankings = extract_pitcher_rankings()
+    Posts are requested and parsed one page at a time, so a whole season can be
+    processed without holding every post in memory.
+    """
+    for post in iter_streamer_posts(after=after, before=before):
+        yield post, parse_streamer_rankings(post['content']['rendered'])
 
 # Step 6: Connect to your ESPN Fantasy Baseball League
 league_id = os.getenv("SECRET_LEAGUE_ID")
@@ -106,212 +309,94 @@ season_id = 2025
 espn_s2 = os.getenv("SECRET_ESPN_S2_COOKIE")
 swid = os.getenv("SECRET_SWID")
 
-def espn_fuzzy_match():
-    # Authenticate and connect to the league
-    league = League(league_id=league_id, year=season_id, espn_s2=espn_s2, swid=swid)
-
-    # Step 7: Fetch available players
-    available_players = league.free_agents(size=500, position='P')
-
-    # Step 8: Filter for pitchers
-    # Check if the player is a pitcher by looking for 'SP' or 'RP' in eligibleSlots
-    available_pitchers = [
-        player for player in available_players
-        if 'P' in player.eligibleSlots
-    ]
-
-    # Step 9: Compare with rankings using exact and fuzzy matching
-    available_ranked_pitchers = []
-
-    # Extract player names from rankings
-    ranked_player_names = [ranking['Player'] for ranking in rankings]
-
-    # Perform exact and fuzzy matching
-    for pitcher in available_pitchers:
-        # Exact match
-        if pitcher.name in ranked_player_names:
-            match_name = pitcher.name  # Exact match
-        else:
-            # Fuzzy match
-            match, score, _ = process.extractOne(
-                pitcher.name, ranked_player_names, scorer=fuzz.ratio
-            )
-            if score >= 85:  # Adjust threshold as needed
-                match_name = match  # Fuzzy matched name
-            else:
-                match_name = None  # No match found
-
-        # If a match is found, update the rankings DataFrame
-        if match_name:
-            df.loc[df['Player'] == match_name, 'ESPN Name'] = pitcher.name
-        
-    return df
+def fetch_free_agent_pitchers(league=None, ttl=None):
+    """
+    Return a league's free agents eligible to pitch, as a FreeAgentPool.
 
-df = espn_fuzzy_match()
+    Steps 7-8: the pool comes from the local snapshot, refreshed with only the
+    roster changes since the last run (see fbb/espn_pool.py).
 
-def get_team_runs_rankings():
-    """
-    Scrape MLB team runs per game rankings from teamrankings.com.
-    Returns a dictionary with team abbreviations as keys and runs rank as values.
+    Args:
+        league: LeagueConfig to query (default: the SECRET_LEAGUE_ID league).
+        ttl: Seconds the snapshot is used without asking ESPN (default: ESPN_POOL_TTL).
     """
-    url = "https://www.teamrankings.com/mlb/stat/runs-per-game"
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-    }
-    
-    # Create a dictionary of team name variations to abbreviations
-    team_abbrev = {
-        'Arizona': 'ARI', 'Atlanta': 'ATL', 'Baltimore': 'BAL', 'Boston': 'BOS',
-        'Chicago Cubs': 'CHC', 'Chi Cubs': 'CHC', 'Chicago White Sox': 'CWS', 
-        'Chi Sox': 'CHW', 'Cincinnati': 'CIN', 'Cleveland': 'CLE',
-        'Colorado': 'COL', 'Detroit': 'DET', 'Houston': 'HOU',
-        'Kansas City': 'KCR', 'LA Angels': 'LAA', 'LA Dodgers': 'LAD',
-        'Miami': 'MIA', 'Milwaukee': 'MIL', 'Minnesota': 'MIN', 'NY Mets': 'NYM',
-        'NY Yankees': 'NYY', 'Sacramento': 'ATH', 'Philadelphia': 'PHI',
-        'Pittsburgh': 'PIT', 'San Diego': 'SDP', 'SF Giants': 'SFG',
-        'Seattle': 'SEA', 'St. Louis': 'STL', 'Tampa Bay': 'TBR', 'Texas': 'TEX',
-        'Toronto': 'TOR', 'Washington': 'WSN'
-    }
-    
-    response = requests.get(url, headers=headers)
-    response.raise_for_status()
-    soup = BeautifulSoup(response.content, 'html.parser')
-    
-    # Initialize dictionary for rankings
-    runs_rankings = {}
-    
-    # Find all table rows except header
-    rows = soup.select('table.datatable tbody tr')
-    
-    # Process each row
-    for rank, row in enumerate(rows, 1):
-        # Get team name from the first cell
-        cells = row.find_all('td')
-        if cells:
-            team_name = cells[1].text.strip()
-            
-            # Match team name to abbreviation
-            for name, abbrev in team_abbrev.items():
-                if name.lower() in team_name.lower():
-                    runs_rankings[abbrev] = rank
-                    break
-    
-    return runs_rankings
+    league = league or default_league()
+    return fetch_free_agents(league.league_id, league.season, espn_s2=league.espn_s2, swid=league.swid, ttl=ttl)
+
+@metrics.measured()
+def espn_fuzzy_match(df, available_pitchers, identity_store):
+    """Add an 'ESPN Name' column to the rankings for pitchers who are free agents."""
+    # Step 9: Compare with rankings using one batched fuzzy score matrix
+    ranked_player_names = df['Player'].dropna().unique().tolist()
+    pool = available_pitchers if isinstance(available_pitchers, FreeAgentPool) else FreeAgentPool(available_pitchers)
+
+    def match(unknown, remaining):
+        # Same normalized name first, from the pool's index; only the rest are scored
+        matches = pool.exact_matches(unknown, remaining)
+        claimed = {name for name, _ in matches.values()}
+        matches.update(match_names([name for name in remaining if name not in claimed],
+                                   [name for name in unknown if name not in matches], threshold=85, with_scores=True))
+        return matches
+
+    # Names matched on an earlier run come straight from the identity store
+    matches = identity_store.resolve('espn', ranked_player_names, pool.names, match)
+
+    # Step 10: Write every match back in a single vectorized assignment
+    df['ESPN Name'] = df['Player'].map(matches)
 
-runs_rankings = get_team_runs_rankings()
+    return df
 
-creds_json = os.environ.get("SECRET_GOOGLE_SERVICE_ACCOUNT_KEY")
+SOURCE_SHEET_ID = "15yyCk5HEIUbWMMyVC3-P-UorLXUT52eiIp3lD2ST1TA"
+SOURCE_SHEET_NAME = "ranks June 3"
 
-def get_google_client():
-    """Set up and return authenticated Google Sheets client."""
-    scope = [
-        'https://spreadsheets.google.com/feeds',
-        'https://www.googleapis.com/auth/drive',
-        'https://www.googleapis.com/auth/spreadsheets'
-    ]
-    
-    # Try to get credentials from environment variable first
-    if creds_json:
-        creds = ServiceAccountCredentials.from_json_keyfile_dict(
-            json.loads(creds_json), 
-            scope
-        )
-    # If not found, use the local JSON file
-    else:
-        if not os.path.exists(creds_file):
-            raise FileNotFoundError("Google Sheets credentials not found")
-        creds = ServiceAccountCredentials.from_json_keyfile_name(creds_file, scope)
-    
-    return gspread.authorize(creds)
-
-def import_google_sheet(sheet_id, sheet_name):
-    """Import data from Google Sheet using sheet ID."""
-    client = get_google_client()
-    sheet = client.open_by_key(sheet_id).worksheet(sheet_name)
-    
-    # Get all values including headers
-    all_values = sheet.get_all_values()
-    if not all_values:
-        return []
-    
-    # Get headers from first row
-    headers = all_values[0]
-    
-    # Make headers unique by adding a counter to duplicates
-    unique_headers = []
-    header_count = {}
-    
-    for header in headers:
-        if header in header_count:
-            header_count[header] += 1
-            unique_headers.append(f"{header}_{header_count[header]}")
-        else:
-            header_count[header] = 0
-            unique_headers.append(header)
-    
-    # Create list of dictionaries with unique headers
-    records = []
-    for row in all_values[1:]:  # Skip header row
-        record = {}
-        for header, value in zip(unique_headers, row):
-            record[header] = value
-        records.append(record)
-    
-    return records
+# The only Eno columns the pipeline uses, and which of them hold numbers
+ENO_COLUMNS = ['Eno', 'Name', 'Stuff+', 'Location+', 'Pitching+', 'Blurb']
+ENO_NUMERIC_COLUMNS = ['Eno', 'Stuff+', 'Location+', 'Pitching+']
 
-SOURCE_SHEET_ID = "15yyCk5HEIUbWMMyVC3-P-UorLXUT52eiIp3lD2ST1TA"
-google_sheet_data = import_google_sheet(SOURCE_SHEET_ID, "ranks June 3")
+@metrics.measured()
+def load_eno_rankings():
+    """Load just the Eno columns the pipeline uses, as a typed DataFrame."""
+    return read_frame(SOURCE_SHEET_ID, SOURCE_SHEET_NAME, ENO_COLUMNS, numeric=ENO_NUMERIC_COLUMNS)
 
-def process_google_sheet_data(df, google_sheet_data):
+def process_google_sheet_data(df, google_sheet_data, opponent_ranks, identity_store=None):
     """
     Process Google Sheets data and update the rankings DataFrame with fuzzy matching.
     Args:
         df: DataFrame containing the rankings data.
-        google_sheet_data: List of dictionaries containing Google Sheets data.
+        google_sheet_data: DataFrame from load_eno_rankings.
+        opponent_ranks: Team x stat rank matrix from opponent_rank_matrix.
+        identity_store: Optional IdentityStore with previously confirmed matches.
     Returns:
         Updated DataFrame with Google Sheets data merged.
     """
 
     # Step 11: Perform fuzzy matching on Google Sheets data and update the DataFrame
-    google_sheet_df = pd.DataFrame(google_sheet_data)  # Convert Google Sheets data to a DataFrame
-
-    # Ensure the Google Sheets DataFrame has only the required columns
-    google_sheet_df = google_sheet_df[['Eno', 'Name', 'Stuff+', 'Location+', 'Pitching+', 'Blurb']]
+    # Ensure the Google Sheets DataFrame has only the required columns (already typed by load_eno_rankings)
+    google_sheet_df = google_sheet_data[ENO_COLUMNS]
 
     # Rename the 'Blurb' column to 'Notes'
-    google_sheet_df.rename(columns={'Blurb': 'Notes'}, inplace=True)
-    google_sheet_df.rename(columns={'Name': 'Eno Name'}, inplace=True)
-
-    # Perform fuzzy matching between rankings and Google Sheets data
-    for index, row in df.iterrows():
-        player_name = row['Player']  # Player name from rankings DataFrame
-
-        # Fuzzy match with the 'Name' column in Google Sheets data
-        match, score, _ = process.extractOne(
-            player_name, google_sheet_df['Eno Name'], scorer=fuzz.ratio
-        )
-        if score >= 85:  # Adjust threshold as needed
-            # Get the matching row from Google Sheets data
-            matched_row = google_sheet_df[google_sheet_df['Eno Name'] == match].iloc[0]
-
-            # Add the Google Sheets data to the rankings DataFrame
-            df.loc[index, 'Eno Name'] = matched_row['Eno Name']
-            df.loc[index, 'Eno'] = pd.to_numeric(matched_row['Eno'], errors='coerce')
-            df.loc[index, 'Stuff+'] = pd.to_numeric(matched_row['Stuff+'], errors='coerce')
-            df.loc[index, 'Location+'] = pd.to_numeric(matched_row['Location+'], errors='coerce')
-            df.loc[index, 'Pitching+'] = pd.to_numeric(matched_row['Pitching+'], errors='coerce')
-            df.loc[index, 'Notes'] = matched_row['Notes']
-
-    # Add Opponent Runs Rank column
-    df['Opp Runs'] = df['Opponent'].map(runs_rankings)
+    google_sheet_df = google_sheet_df.rename(columns={'Blurb': 'Notes', 'Name': 'Eno Name'})
+
+    # Match rankings to the Eno sheet by name (exact first, then fuzzy) and join every column at once
+    df = fuzzy_join(df, google_sheet_df, left_on='Player', right_on='Eno Name', threshold=85,
+                    store=identity_store, source='eno')
+
+    # Join every opponent rank column at once, on the opponent's normalized team code
+    opponent_ranks = opponent_ranks.add_prefix('Opp ')
+    df['_opponent_code'] = team_codes(df['Opponent'])
+    df = df.join(opponent_ranks, on='_opponent_code').drop(columns='_opponent_code')
 
     # Reorder the DataFrame columns
     column_order = [
-        'Player', 'Eno Name', 'ESPN Name', 'Tier', 'Opponent', 'Opp Runs', 'Blurb',
+        'Player', 'Eno Name', 'ESPN Name', 'Tier', 'Opponent', *opponent_ranks.columns, 'Blurb',
         'Eno', 'Stuff+', 'Location+', 'Pitching+', 'Notes'
     ]
     df = df[column_order]
 
+    # Ranks are whole numbers; teams without one are left blank
+    rank_columns = list(opponent_ranks.columns)
+    df[rank_columns] = df[rank_columns].astype('Int64').astype(object).where(df[rank_columns].notna(), '')
+
     # Round the specified columns to whole numbers
     columns_to_round = ['Eno', 'Stuff+', 'Location+', 'Pitching+']
 
@@ -332,25 +417,26 @@ def process_google_sheet_data(df, google_sheet_data):
 
     return df
 
-df = process_google_sheet_data(df, google_sheet_data)
+@metrics.measured()
+def export_to_google_sheet(df, sheet_id, sheet_name, sync=True, current=None):
+    """
+    Export DataFrame to Google Sheet using sheet ID.
 
-def export_to_google_sheet(df, sheet_id, sheet_name):
-    """Export DataFrame to Google Sheet using sheet ID."""
-    client = get_google_client()
-    
+    With sync=True only the cells that changed since the last export are
+    written, matching rows by 'Player'. With sync=False the sheet is cleared
+    and rewritten. `current` is the sheet's contents, if already read.
+    """
     try:
-        spreadsheet = client.open_by_key(sheet_id)
-        try:
-            worksheet = spreadsheet.worksheet(sheet_name)
-        except gspread.WorksheetNotFound:
-            worksheet = spreadsheet.add_worksheet(sheet_name, rows=1000, cols=26)
+        worksheet = get_or_create_worksheet(sheet_id, sheet_name)
         
         # Prepare and export data
         df_export = df.copy().fillna('').astype(str)
         data_to_export = [df_export.columns.values.tolist()] + df_export.values.tolist()
         
-        worksheet.clear()
-        worksheet.update(data_to_export, value_input_option='RAW')
+        if sync:
+            sync_worksheet(worksheet, data_to_export, key_column='Player', current=current)
+        else:
+            write_worksheet(worksheet, data_to_export, clear=True, value_input_option='RAW')
         print(f"Data successfully exported to {sheet_name}")
         
     except Exception as e:
@@ -366,6 +452,210 @@ def export_to_google_sheet(df, sheet_id, sheet_name):
 
 TARGET_SHEET_ID = os.getenv("SECRET_GOOGLE_SPREADSHEET_ID")
 # TARGET_SHEET_ID = extract_sheet_id(TARGET_SHEET_URL)
-export_to_google_sheet(df, TARGET_SHEET_ID, 'Sheet2')
+TARGET_SHEET_NAME = 'Sheet2'
+# Seconds between watch-mode checks of the opponent stat pages
+OPPONENTS_POLL = 60 * 60
+
+def default_league(target_sheet_id=None, target_sheet_name=TARGET_SHEET_NAME):
+    """The single league configured by SECRET_LEAGUE_ID, written to the given tab."""
+    return LeagueConfig(name=None, league_id=league_id, season=season_id, sheet_id=target_sheet_id or TARGET_SHEET_ID,
+                        sheet_name=target_sheet_name, espn_s2=espn_s2, swid=swid)
+
+def configured_leagues(path=None):
+    """The leagues from --leagues, FBB_LEAGUES_FILE or SECRET_FBB_LEAGUES (see fbb/leagues.py), or None."""
+    return load_leagues(path, season=season_id, sheet_id=TARGET_SHEET_ID, espn_s2=espn_s2, swid=swid)
+
+def record_snapshot(merged, name='pitchers'):
+    """
+    Add this run's table to the local history, storing only rows that changed.
+
+    Rows are keyed on Player alone, so each pitcher's Tier and Blurb history is
+    one series across starts; the Opponent is tracked as a field like the rest.
+    A pitcher missing from a post gets a tombstone until they are ranked again.
+    """
+    changed = HistoryStore.from_env().record_snapshot(name, merged.to_dict('records'), name_field='Player')
+    print(f"History: {changed} rows changed since the last snapshot")
+    return changed
+
+def league_table(merged, pool):
+    """A league's copy of the shared table: ESPN names are kept only for that league's free agents."""
+    df = merged.copy()
+    df['ESPN Name'] = df['ESPN Name'].where(df['ESPN Name'].isin({player.name for player in pool}))
+    return df
+
+def _stage_name(name, league):
+    # The single default league keeps the plain stage names
+    return name if league.name is None else f"{name}:{league.name}"
+
+def build_stages(target_sheet_id=None, target_sheet_name=TARGET_SHEET_NAME, export=True, leagues=None):
+    """
+    Declare the pipeline's stages and what each one needs.
+
+    The sources (Pitcher List, ESPN, the opponent stat pages and the Eno sheet)
+    do not depend on each other, so they are fetched at the same time.
+
+    With several leagues, everything but the free agents is fetched, parsed and
+    matched once: each league's pool is fetched concurrently, the rankings are
+    matched against all the pools together, and each league's table only keeps
+    the ESPN names that are free agents in that league. Stages for one league
+    are suffixed with its name, e.g. 'export:Home'.
+
+    Args:
+        target_sheet_id, target_sheet_name: Output tab of the default league.
+        export: Write each league's table to its tab and record it in the history.
+        leagues: LeagueConfigs to run (default: the SECRET_LEAGUE_ID league).
+    """
+    leagues = leagues or [default_league(target_sheet_id, target_sheet_name)]
+    seasons = sorted({league.season for league in leagues})
+    # Every current output tab is read together, one batch call per spreadsheet
+    output_ranges = [(league.sheet_id, league.sheet_name) for league in leagues]
+    pool_stages = [_stage_name('free_agents', league) for league in leagues]
+
+    def match_all_pools(rankings, identity_store, **pools):
+        union = FreeAgentPool(player for pool in pools.values() for player in pool)
+        return espn_fuzzy_match(rankings, union, identity_store)
+
+    def merge_seasons(espn_match, eno_sheet, opponent_ranks, identity_store):
+        # Seasons after the first find their Eno matches in the identity store
+        return {season: process_google_sheet_data(espn_match.copy(), eno_sheet, opponent_ranks[season], identity_store)
+                for season in seasons}
+
+    stages = [
+        Stage('identity_store', IdentityStore.from_env),
+        Stage('rankings', lambda: extract_pitcher_rankings()[0]),
+        Stage('opponent_ranks', lambda: {season: opponent_rank_matrix(season=season) for season in seasons}),
+        Stage('eno_sheet', load_eno_rankings),
+        Stage('espn_match', match_all_pools, deps=('rankings', 'identity_store', *pool_stages)),
+        Stage('merged', merge_seasons, deps=('espn_match', 'eno_sheet', 'opponent_ranks', 'identity_store')),
+    ]
+    if export:
+        stages.append(Stage('output_tabs', lambda: read_many(output_ranges)))
+    for index, league in enumerate(leagues):
+        stages += _league_stages(league, pool_stages[index], index, export)
+    return stages
+
+def _league_stages(league, pool_stage, tab_index, export):
+    """One league's stages: its free agents, its table and, when exporting, its tab and history."""
+    table_stage = _stage_name('table', league)
+
+    def table(merged, **pools):
+        return league_table(merged[league.season], pools[pool_stage])
+
+    def export_table(output_tabs, **tables):
+        return export_to_google_sheet(tables[table_stage], league.sheet_id, league.sheet_name,
+                                      current=output_tabs[tab_index])
+
+    def snapshot(**tables):
+        return record_snapshot(tables[table_stage], 'pitchers' if league.name is None else f"pitchers/{league.name}")
+
+    stages = [
+        Stage(pool_stage, lambda: fetch_free_agent_pitchers(league)),
+        Stage(table_stage, table, deps=('merged', pool_stage)),
+    ]
+    if export:
+        stages.append(Stage(_stage_name('export', league), export_table, deps=(table_stage, 'output_tabs')))
+        stages.append(Stage(_stage_name('snapshot', league), snapshot, deps=(table_stage,)))
+    return stages
+
+def _run(stages, results=None):
+    start = time.perf_counter()
+    results, timings = run_stages(stages, results=results)
+    print(f"Pipeline finished in {time.perf_counter() - start:.2f}s "
+          f"(sum of stages {sum(timings.values()):.2f}s)")
+    print(get_transport().summary())
+    return results, timings
+
+@metrics.measured('pitchers')
+def run_pipeline(target_sheet_id=None, target_sheet_name=TARGET_SHEET_NAME, export=True):
+    """
+    Run the streamer pipeline, fetching every source concurrently.
+
+    Returns:
+        (df, timings): the final DataFrame and each stage's wall time in seconds.
+    """
+    results, timings = _run(build_stages(target_sheet_id, target_sheet_name, export=export))
+    return results['table'], timings
+
+@metrics.measured('pitchers')
+def run_leagues(leagues, export=True):
+    """
+    Run the pipeline for several leagues, sharing every fetch and match that does not depend on the league.
+
+    Returns:
+        ({league name: df}, timings)
+    """
+    results, timings = _run(build_stages(export=export, leagues=leagues))
+    return {league.name: results[_stage_name('table', league)] for league in leagues}, timings
+
+def eno_revision():
+    """The Eno spreadsheet's Drive revision, or a digest of its columns if Drive metadata cannot be read."""
+    try:
+        return sheet_revision(SOURCE_SHEET_ID)
+    except Exception as e:
+        # A sheet shared only by link may not expose its Drive metadata to the service account
+        print(f"Eno sheet revision unavailable ({type(e).__name__}), comparing its columns instead")
+        return hashlib.sha256(load_eno_rankings().to_csv().encode()).hexdigest()
+
+def pool_revision(league):
+    """A digest of the league's free-agent ids, after asking ESPN for roster changes (one small request)."""
+    pool = fetch_free_agent_pitchers(league, ttl=0)
+    return hashlib.sha256(','.join(str(player_id) for player_id in sorted(pool.by_id)).encode()).hexdigest()
+
+def build_signals(leagues, opponents_every=OPPONENTS_POLL):
+    """
+    The cheap checks watch mode polls, one per source, and the stages each source feeds.
+
+    The opponent stat pages move once a day at most, so they are checked every
+    `opponents_every` seconds rather than on every poll.
+    """
+    seasons = sorted({league.season for league in leagues})
+    signals = [
+        Signal('pitcherlist', latest_revision, stages=('rankings',)),
+        Signal('opponents', lambda: opponent_revision(seasons), stages=('opponent_ranks',), every=opponents_every),
+        Signal('eno', eno_revision, stages=('eno_sheet',)),
+    ]
+    for league in leagues:
+        pool_stage = _stage_name('free_agents', league)
+        signals.append(Signal(pool_stage, lambda league=league: pool_revision(league), stages=(pool_stage,)))
+    return signals
+
+def watch_pipeline(target_sheet_id=None, target_sheet_name=TARGET_SHEET_NAME, export=True, leagues=None,
+                   interval=None, duration=None):
+    """
+    Keep the streamer tables current: poll each source's cheap signal and re-run only what changed.
+
+    The first poll runs the whole pipeline, unless nothing changed since the
+    last run saved its signals (see watch.py). After that, a new Pitcher List
+    post re-runs the parsing, matching, merging and exports, while a changed
+    free-agent pool re-runs only the matching and what follows. The output
+    tabs are re-read before every export.
+
+    Args:
+        leagues: LeagueConfigs to run (default: the SECRET_LEAGUE_ID league, written to the given tab).
+        interval: Seconds between polls (default: WATCH_INTERVAL).
+        duration: Stop after this many seconds (default: run until interrupted).
+    """
+    leagues = leagues or [default_league(target_sheet_id, target_sheet_name)]
+    # Saved signals only count for the same leagues and output tabs (cookies left out)
+    key = json.dumps([[league.name, league.league_id, league.season, league.sheet_id, league.sheet_name]
+                      for league in leagues] + [export])
+    return watch(build_stages(export=export, leagues=leagues), build_signals(leagues), interval=interval,
+                 always=('output_tabs',) if export else (), duration=duration, key=key, run=_run)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build the starting pitcher streamer sheet.")
+    parser.add_argument('--sheet-id', default=None, help="target spreadsheet ID (default: SECRET_GOOGLE_SPREADSHEET_ID)")
+    parser.add_argument('--sheet-name', default=TARGET_SHEET_NAME, help="target worksheet name")
+    parser.add_argument('--no-export', action='store_true', help="build the table but do not write it to the sheet")
+    parser.add_argument('--leagues', default=None, help="JSON file of leagues to run together (see fbb/leagues.py)")
+    args = parser.parse_args(argv)
+
+    leagues = configured_leagues(args.leagues)
+    if leagues:
+        run_leagues(leagues, export=not args.no_export)
+    else:
+        run_pipeline(args.sheet_id, args.sheet_name, export=not args.no_export)
+    print("Success")
 
-print("Success")
+if __name__ == '__main__':
+    main()
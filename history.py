@@ -0,0 +1,192 @@
+"""
+Append-only history of every scraped table, kept in a local SQLite file.
+
+Each run records a snapshot of a dataset ('pitchers', 'charts/drake/hot-100',
+...). Only rows that differ from the latest stored version of the same key are
+written, and keys that vanished get a tombstone, so the table holds one row per
+change rather than one per run. Trend questions are answered from the indexes
+without fetching anything:
+
+    python -m history fields pitchers "Max Fried" Tier
+    python -m history fields charts/drake/hot-100 "God's Plan" weeks_on_chart
+    python -m history rows pitchers "Max Fried"
+"""
+import argparse
+import json
+import math
+import os
+import sqlite3
+from contextlib import closing
+from datetime import datetime, timezone
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS snapshots (
+    dataset TEXT NOT NULL,
+    seen_at TEXT NOT NULL,
+    row_count INTEGER NOT NULL,
+    changed INTEGER NOT NULL,
+    PRIMARY KEY (dataset, seen_at)
+);
+CREATE TABLE IF NOT EXISTS records (
+    dataset TEXT NOT NULL,
+    key TEXT NOT NULL,
+    name TEXT NOT NULL,
+    seen_at TEXT NOT NULL,
+    data TEXT,
+    PRIMARY KEY (dataset, key, seen_at)
+);
+CREATE INDEX IF NOT EXISTS records_by_name ON records (dataset, name, seen_at);
+CREATE INDEX IF NOT EXISTS records_by_date ON records (dataset, seen_at);
+CREATE TABLE IF NOT EXISTS latest (
+    dataset TEXT NOT NULL,
+    key TEXT NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (dataset, key)
+);
+"""
+
+
+def _clean(value):
+    # NaN is not valid JSON and would make every comparison look like a change
+    if isinstance(value, float) and math.isnan(value):
+        return None
+    return value
+
+
+class HistoryStore:
+    def __init__(self, path='.history.sqlite'):
+        self.path = path
+        with closing(self._connect()) as conn, conn:
+            conn.executescript(SCHEMA)
+
+    @classmethod
+    def from_env(cls):
+        return cls(os.environ.get('HISTORY_DB', '.history.sqlite'))
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    def record_snapshot(self, dataset, rows, name_field, key_fields=None, seen_at=None):
+        """
+        Add a snapshot of `dataset`, storing only what changed since the last one.
+
+        Args:
+            dataset: Dataset name, e.g. 'pitchers'.
+            rows: List of dictionaries.
+            name_field: Field queries look rows up by, e.g. 'Player' or 'title'.
+            key_fields: Fields that together identify a row within a snapshot;
+                defaults to just `name_field`.
+            seen_at: Snapshot time as an ISO string; defaults to now (UTC).
+
+        Returns:
+            The number of rows written (changed, new or removed keys).
+        """
+        key_fields = key_fields or [name_field]
+        seen_at = seen_at or datetime.now(timezone.utc).isoformat(timespec='seconds')
+
+        incoming = {}
+        for row in rows:
+            row = {field: _clean(value) for field, value in row.items()}
+            key = '|'.join(str(row.get(field, '')) for field in key_fields)
+            incoming[key] = (str(row.get(name_field, '')), json.dumps(row, sort_keys=True, default=str))
+
+        with closing(self._connect()) as conn, conn:
+            latest = dict(conn.execute("SELECT key, data FROM latest WHERE dataset = ?", (dataset,)))
+
+            changed = [(dataset, key, name, seen_at, data) for key, (name, data) in incoming.items()
+                       if latest.get(key) != data]
+            removed = [key for key in latest if key not in incoming]
+            removed_names = {
+                key: json.loads(latest[key]).get(name_field, '') for key in removed
+            }
+
+            conn.executemany("INSERT OR REPLACE INTO records VALUES (?, ?, ?, ?, ?)", changed)
+            conn.executemany("INSERT OR REPLACE INTO records VALUES (?, ?, ?, ?, NULL)",
+                             [(dataset, key, str(removed_names[key]), seen_at) for key in removed])
+            conn.executemany("INSERT OR REPLACE INTO latest VALUES (?, ?, ?)",
+                             [(dataset, key, data) for _, key, _, _, data in changed])
+            conn.executemany("DELETE FROM latest WHERE dataset = ? AND key = ?", [(dataset, key) for key in removed])
+            conn.execute("INSERT OR REPLACE INTO snapshots VALUES (?, ?, ?, ?)",
+                         (dataset, seen_at, len(incoming), len(changed) + len(removed)))
+
+        return len(changed) + len(removed)
+
+    def rows(self, dataset, name, since=None, until=None):
+        """
+        Every stored version of the rows for `name`, oldest first.
+
+        Returns:
+            A list of (seen_at, key, row) tuples; row is None when the key was
+            missing from that snapshot.
+        """
+        query = "SELECT seen_at, key, data FROM records WHERE dataset = ? AND name = ?"
+        params = [dataset, name]
+        if since:
+            query += " AND seen_at >= ?"
+            params.append(since)
+        if until:
+            query += " AND seen_at <= ?"
+            params.append(until)
+        with closing(self._connect()) as conn:
+            return [
+                (seen_at, key, json.loads(data) if data is not None else None)
+                for seen_at, key, data in conn.execute(query + " ORDER BY seen_at, key", params)
+            ]
+
+    def field_history(self, dataset, name, field, since=None, until=None):
+        """
+        How one field of `name` changed over time, e.g. a pitcher's 'Tier'.
+
+        Returns:
+            A list of (seen_at, key, value) tuples, one per change of value for each key.
+        """
+        history = []
+        last = {}
+        for seen_at, key, row in self.rows(dataset, name, since, until):
+            value = row.get(field) if row is not None else None
+            if key not in last or last[key] != value:
+                history.append((seen_at, key, value))
+                last[key] = value
+        return history
+
+    def snapshots(self, dataset):
+        """List of (seen_at, row_count, changed) for each snapshot of a dataset."""
+        with closing(self._connect()) as conn:
+            return conn.execute(
+                "SELECT seen_at, row_count, changed FROM snapshots WHERE dataset = ? ORDER BY seen_at", (dataset,)
+            ).fetchall()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Query the local history of scraped tables.")
+    parser.add_argument('--db', default=os.environ.get('HISTORY_DB', '.history.sqlite'))
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    snapshots_parser = commands.add_parser('snapshots', help="list the snapshots of a dataset")
+    snapshots_parser.add_argument('dataset')
+
+    rows_parser = commands.add_parser('rows', help="show every stored version of a player's or song's rows")
+    rows_parser.add_argument('dataset')
+    rows_parser.add_argument('name')
+
+    fields_parser = commands.add_parser('fields', help="show how one field changed over time")
+    fields_parser.add_argument('dataset')
+    fields_parser.add_argument('name')
+    fields_parser.add_argument('field')
+
+    args = parser.parse_args(argv)
+    store = HistoryStore(args.db)
+
+    if args.command == 'snapshots':
+        for seen_at, row_count, changed in store.snapshots(args.dataset):
+            print(f"{seen_at}  {row_count} rows, {changed} changed")
+    elif args.command == 'rows':
+        for seen_at, key, row in store.rows(args.dataset, args.name):
+            print(f"{seen_at}  {key}  {json.dumps(row) if row is not None else '(removed)'}")
+    elif args.command == 'fields':
+        for seen_at, key, value in store.field_history(args.dataset, args.name, args.field):
+            print(f"{seen_at}  {key}  {value}")
+
+
+if __name__ == '__main__':
+    main()
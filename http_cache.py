@@ -0,0 +1,209 @@
+"""
+On-disk HTTP cache shared by scraper.py and fbb/pitchers.py.
+
+Responses are kept under HTTP_CACHE_DIR (default .http_cache). A cached
+response younger than its source's TTL is served without touching the network;
+an older one is revalidated with If-None-Match / If-Modified-Since, and a 304
+serves the cached body. The cache is trimmed back under HTTP_CACHE_MAX_MB by
+evicting the least recently used entries.
+
+Set HTTP_CACHE_OFFLINE=1 to serve everything from the cache (whatever its age)
+and never hit the network, e.g. to rerun a job offline.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+from transport import get_transport
+
+# Seconds a response is served without revalidation, by host
+DEFAULT_TTLS = {
+    'www.billboard.com': 60 * 60,
+    'pitcherlist.com': 10 * 60,
+    'www.teamrankings.com': 60 * 60,
+    'www.fangraphs.com': 60 * 60,
+}
+
+
+class CacheMiss(requests.exceptions.RequestException):
+    """Raised in offline mode when a URL has never been cached."""
+
+
+class HTTPCache:
+    def __init__(self, directory='.http_cache', max_bytes=100 * 1024 * 1024, ttls=None, default_ttl=0, offline=False):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.ttls = dict(DEFAULT_TTLS if ttls is None else ttls)
+        self.default_ttl = default_ttl
+        self.offline = offline
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            directory=os.environ.get('HTTP_CACHE_DIR', '.http_cache'),
+            max_bytes=int(float(os.environ.get('HTTP_CACHE_MAX_MB', '100')) * 1024 * 1024),
+            offline=os.environ.get('HTTP_CACHE_OFFLINE', '') not in ('', '0'),
+        )
+
+    def ttl_for(self, url):
+        host = requests.utils.urlparse(url).netloc
+        return self.ttls.get(host, self.default_ttl)
+
+    def get(self, url, headers=None, ttl=None, session=None, **kwargs):
+        """
+        GET a URL through the cache.
+
+        Args:
+            url: The URL to fetch.
+            headers: Extra request headers.
+            ttl: Seconds to serve without revalidating; defaults to the host's TTL.
+            session: Optional requests.Session (or compatible) to send requests with;
+                defaults to the shared Transport.
+            **kwargs: Passed through to the underlying get().
+
+        Returns:
+            A requests.Response. Responses served locally have `from_cache` set to True.
+        """
+        key = hashlib.sha256(url.encode('utf-8')).hexdigest()
+        entry = self._load(key)
+        ttl = self.ttl_for(url) if ttl is None else ttl
+
+        if self.offline:
+            if entry is None:
+                raise CacheMiss(f"{url} is not in the cache (offline mode)")
+            return self._response(key, entry)
+
+        if entry is not None and time.time() - entry['fetched_at'] < ttl:
+            return self._response(key, entry)
+
+        request_headers = dict(headers or {})
+        if entry is not None:
+            if entry.get('etag'):
+                request_headers['If-None-Match'] = entry['etag']
+            if entry.get('last_modified'):
+                request_headers['If-Modified-Since'] = entry['last_modified']
+
+        response = (session or get_transport()).get(url, headers=request_headers, **kwargs)
+
+        if response.status_code == 304 and entry is not None:
+            entry['fetched_at'] = time.time()
+            self._write_meta(key, entry)
+            return self._response(key, entry)
+
+        if response.status_code == 200:
+            self._store(key, url, response)
+        return response
+
+    def _path(self, key, suffix):
+        return os.path.join(self.directory, f"{key}.{suffix}")
+
+    def _load(self, key):
+        try:
+            with open(self._path(key, 'json')) as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if not os.path.exists(self._path(key, 'body')):
+            return None
+        return entry
+
+    def _response(self, key, entry):
+        body_path = self._path(key, 'body')
+        with open(body_path, 'rb') as f:
+            content = f.read()
+        # Touch the body so eviction treats it as recently used
+        os.utime(body_path)
+
+        response = requests.Response()
+        response.status_code = 200
+        response._content = content
+        response.headers = CaseInsensitiveDict(entry['headers'])
+        response.url = entry['url']
+        response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+        response.from_cache = True
+        return response
+
+    def _write_meta(self, key, entry):
+        self._atomic_write(self._path(key, 'json'), json.dumps(entry).encode('utf-8'))
+
+    def _store(self, key, url, response):
+        response.from_cache = False
+        content = response.content
+        if len(content) > self.max_bytes:
+            return
+
+        entry = {
+            'url': url,
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+            'fetched_at': time.time(),
+            'headers': dict(response.headers),
+        }
+        self._atomic_write(self._path(key, 'body'), content)
+        self._write_meta(key, entry)
+        self._evict()
+
+    def _atomic_write(self, path, data):
+        temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temp_path, 'wb') as f:
+            f.write(data)
+        os.replace(temp_path, path)
+
+    def _evict(self):
+        """Drop least recently used entries until the cache fits in max_bytes."""
+        with self._lock:
+            bodies = []
+            for name in os.listdir(self.directory):
+                if name.endswith('.body'):
+                    stat = os.stat(os.path.join(self.directory, name))
+                    bodies.append((stat.st_mtime, stat.st_size, name[:-len('.body')]))
+
+            total = sum(size for _, size, _ in bodies)
+            for _, size, key in sorted(bodies):
+                if total <= self.max_bytes:
+                    break
+                for suffix in ('body', 'json'):
+                    try:
+                        os.remove(self._path(key, suffix))
+                    except OSError:
+                        pass
+                total -= size
+
+
+_cache = None
+
+
+def get_cache():
+    """Return the process-wide cache, configured from the environment."""
+    global _cache
+    if _cache is None:
+        _cache = HTTPCache.from_env()
+    return _cache
+
+
+def cached_get(url, **kwargs):
+    """Shortcut for get_cache().get(url, ...)."""
+    return get_cache().get(url, **kwargs)
+
+
+def fingerprint(url, **kwargs):
+    """
+    Revalidate a URL now and return a digest of its body.
+
+    With ttl=0 an unchanged page costs one conditional request (a 304 when the
+    server sends validators), and the cache is left fresh for the stage that
+    parses the page next.
+
+    Raises:
+        requests.HTTPError: The page could not be fetched.
+    """
+    response = cached_get(url, ttl=0, **kwargs)
+    response.raise_for_status()
+    return hashlib.sha256(response.content).hexdigest()
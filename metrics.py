@@ -0,0 +1,279 @@
+"""
+Per-stage metrics for both jobs, written as JSON lines.
+
+Every pipeline stage and every instrumented function (extract_table_data,
+extract_pitcher_rankings, espn_fuzzy_match, the Sheets imports and exports, ...)
+is a span. When a span ends, one line is appended to the metrics file with
+
+    wall_s, cpu_s          wall time, and CPU time of the thread that ran it plus
+                           the worker threads it handed work to (see below)
+    http_requests, http_bytes
+    sheets_calls, cells_written
+    fuzzy_comparisons      name pairs scored by the fuzzy matchers
+    peak_rss_mb            the process's peak resident set size so far
+
+Counters are attributed to every span open in the calling context, so a
+pipeline stage includes the work of the functions it calls. Work handed to
+a thread pool is attributed too, counters and CPU time alike, when the pool
+runs functions wrapped with propagate(). CPU spent in other processes (the
+backfill's parser pool) is not included.
+
+Set METRICS_FILE (or pass --metrics to cli.py) to write the file; without it
+spans are still cheap and nothing is written.
+
+Profiling is opt-in per span name:
+
+    PROFILE_STAGES=espn_match,export    cProfile the named spans ('*' for all);
+                                        stats are saved to PROFILE_DIR (default
+                                        .profiles) and the top entries printed
+    TRACE_MEMORY_STAGES=merged          trace Python allocations with tracemalloc;
+                                        the peak goes into the metrics line and the
+                                        top allocation sites are printed
+"""
+import contextvars
+import functools
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import ExitStack, contextmanager
+from datetime import datetime, timezone
+
+COUNTERS = ('http_requests', 'http_bytes', 'sheets_calls', 'cells_written', 'fuzzy_comparisons')
+
+_span = contextvars.ContextVar('metrics_span', default=None)
+_lock = threading.Lock()
+_totals = dict.fromkeys(COUNTERS, 0)
+
+_settings = None
+_run_id = f"{datetime.now(timezone.utc):%Y%m%dT%H%M%SZ}-{os.getpid()}"
+
+# cProfile can only profile one span at a time; tracemalloc is process-wide
+_profiler_lock = threading.Lock()
+_tracing = 0
+
+
+def _names(value):
+    return {name.strip() for name in (value or '').split(',') if name.strip()}
+
+
+def configure(metrics_file=None, profile=None, trace_memory=None, profile_dir=None):
+    """
+    Set where metrics go and which spans to profile. Unset arguments come from the environment.
+
+    Args:
+        metrics_file: JSON-lines file to append to (METRICS_FILE).
+        profile: Span names to run under cProfile, or ['*'] (PROFILE_STAGES).
+        trace_memory: Span names to trace with tracemalloc, or ['*'] (TRACE_MEMORY_STAGES).
+        profile_dir: Where cProfile stats are saved (PROFILE_DIR, default .profiles).
+    """
+    global _settings
+    _settings = {
+        'metrics_file': metrics_file or os.environ.get('METRICS_FILE') or None,
+        'profile': set(profile) if profile else _names(os.environ.get('PROFILE_STAGES')),
+        'trace_memory': set(trace_memory) if trace_memory else _names(os.environ.get('TRACE_MEMORY_STAGES')),
+        'profile_dir': profile_dir or os.environ.get('PROFILE_DIR', '.profiles'),
+    }
+    return _settings
+
+
+def settings():
+    if _settings is None:
+        configure()
+    return _settings
+
+
+def count(name, amount=1):
+    """Add `amount` to a counter for the process and for every span open in this context."""
+    with _lock:
+        _totals[name] += amount
+        span = _span.get()
+        while span is not None:
+            span.counters[name] += amount
+            span = span.parent
+
+
+def totals():
+    """The process-wide counters since start-up."""
+    with _lock:
+        return dict(_totals)
+
+
+def _add_cpu(span, seconds):
+    # Spans opened on this thread already include its CPU time in their own measurement
+    thread = threading.get_ident()
+    with _lock:
+        while span is not None:
+            if span.thread != thread:
+                span.worker_cpu += seconds
+            span = span.parent
+
+
+def propagate(func):
+    """
+    Wrap `func` so calls made from another thread (e.g. in a thread pool) count
+    towards the spans open where propagate() was called, including the CPU time
+    each call takes.
+    """
+    context = contextvars.copy_context()
+    span = context.get(_span)
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        cpu_start = time.thread_time()
+        try:
+            # A context can only be entered by one thread at a time, so each call gets its own copy
+            return context.copy().run(func, *args, **kwargs)
+        finally:
+            _add_cpu(span, time.thread_time() - cpu_start)
+    return wrapper
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MB, or None where it is not available."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return round(peak / (2 ** 20 if sys.platform == 'darwin' else 2 ** 10), 1)
+
+
+class Span:
+    def __init__(self, name, parent):
+        self.name = name
+        self.parent = parent
+        self.counters = dict.fromkeys(COUNTERS, 0)
+        self.extra = {}
+        self.thread = threading.get_ident()
+        self.worker_cpu = 0.0
+
+
+def _selected(name, names):
+    return '*' in names or name in names
+
+
+@contextmanager
+def _profiled(name, span):
+    import cProfile
+
+    if not _profiler_lock.acquire(blocking=False):
+        print(f"[{name}] not profiled: another span is already being profiled")
+        yield
+        return
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+    finally:
+        _profiler_lock.release()
+
+    import pstats
+
+    directory = settings()['profile_dir']
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"{name}-{_run_id}.prof")
+    profiler.dump_stats(path)
+    span.extra['profile'] = path
+    print(f"[{name}] profile saved to {path}; top functions by cumulative time:")
+    pstats.Stats(profiler, stream=sys.stdout).sort_stats('cumulative').print_stats(15)
+
+
+@contextmanager
+def _memory_traced(name, span):
+    import tracemalloc
+
+    global _tracing
+    with _lock:
+        if _tracing == 0:
+            tracemalloc.start()
+        _tracing += 1
+    # Other spans traced at the same time share the peak, so it is an upper bound
+    tracemalloc.reset_peak()
+    try:
+        yield
+    finally:
+        _, peak = tracemalloc.get_traced_memory()
+        snapshot = tracemalloc.take_snapshot()
+        with _lock:
+            _tracing -= 1
+            if _tracing == 0:
+                tracemalloc.stop()
+
+        span.extra['traced_peak_mb'] = round(peak / 2 ** 20, 2)
+        print(f"[{name}] peak traced memory {peak / 2 ** 20:.1f} MB; top allocation sites:")
+        for stat in snapshot.statistics('lineno')[:10]:
+            print(f"  {stat}")
+
+
+def _write(record):
+    path = settings()['metrics_file']
+    if not path:
+        return
+    line = json.dumps(record, default=str) + '\n'
+    with _lock:
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write(line)
+
+
+@contextmanager
+def span(name, **fields):
+    """
+    Measure a block of code as a named span and write its metrics line when it ends.
+
+    Extra keyword arguments are added to the line as they are, e.g. span('export', sheet='Sheet2').
+    """
+    parent = _span.get()
+    current = Span(name, parent)
+    token = _span.set(current)
+    config = settings()
+
+    started_at = datetime.now(timezone.utc)
+    wall_start = time.perf_counter()
+    cpu_start = time.thread_time()
+    error = None
+    try:
+        with ExitStack() as stack:
+            if _selected(name, config['profile']):
+                stack.enter_context(_profiled(name, current))
+            if _selected(name, config['trace_memory']):
+                stack.enter_context(_memory_traced(name, current))
+            yield current
+    except BaseException as e:
+        error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        _span.reset(token)
+        record = {
+            'run': _run_id,
+            'span': name,
+            'parent': parent.name if parent else None,
+            'started_at': started_at.isoformat(timespec='milliseconds'),
+            'wall_s': round(time.perf_counter() - wall_start, 4),
+            'cpu_s': round(time.thread_time() - cpu_start + current.worker_cpu, 4),
+            **current.counters,
+            'peak_rss_mb': peak_rss_mb(),
+            **current.extra,
+            **fields,
+        }
+        if error:
+            record['error'] = error
+        _write(record)
+
+
+def measured(name=None):
+    """Decorator: run every call of the function as a span, named after the function by default."""
+    def decorate(func):
+        span_name = name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(span_name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
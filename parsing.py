@@ -0,0 +1,13 @@
+"""
+HTML parsing helpers shared by the chart scraper, the backfill and the
+fantasy baseball job.
+"""
+
+# lxml is a requirement (the opponent and backfill pages are only parsed with it);
+# the chart and streamer parsers also take parser='bs4'
+DEFAULT_PARSER = 'lxml'
+
+
+def xpath_has_class(name):
+    """An XPath predicate matching elements whose class attribute includes `name`, like the CSS selector `.name`."""
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
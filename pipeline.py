@@ -0,0 +1,110 @@
+"""
+Minimal stage runner: each stage declares the stages it needs, and every stage
+starts as soon as its inputs are ready, so independent network fetches overlap.
+"""
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+import metrics
+
+
+class Stage:
+    """
+    A named step of a pipeline.
+
+    `func` is called with one keyword argument per dependency, holding that
+    dependency's result, e.g. Stage('merge', merge, deps=('rankings', 'eno_sheet'))
+    calls merge(rankings=..., eno_sheet=...).
+    """
+
+    def __init__(self, name, func, deps=()):
+        self.name = name
+        self.func = func
+        self.deps = tuple(deps)
+
+    def __repr__(self):
+        return f"Stage({self.name!r}, deps={self.deps!r})"
+
+
+def run_stages(stages, max_workers=None, results=None, verbose=True):
+    """
+    Run a set of stages concurrently, respecting their dependencies.
+
+    Args:
+        stages: Iterable of Stage objects.
+        max_workers: Thread pool size; defaults to one thread per stage.
+        results: Optional dict of results that are already known. Stages named
+            in it are not run again.
+        verbose: Print each stage's wall time as it finishes.
+
+    Returns:
+        (results, timings): dicts keyed by stage name, with each stage's return
+        value and its wall time in seconds.
+
+    Raises:
+        Whatever the first failing stage raised. Stages not yet started are skipped.
+    """
+    stages = {stage.name: stage for stage in stages}
+    results = dict(results or {})
+    timings = {}
+
+    for stage in stages.values():
+        missing = [dep for dep in stage.deps if dep not in stages and dep not in results]
+        if missing:
+            raise ValueError(f"Stage '{stage.name}' depends on unknown stage(s): {', '.join(missing)}")
+
+    pending = {name: stage for name, stage in stages.items() if name not in results}
+
+    # Each stage is a metrics span, nested under whatever span runs the pipeline
+    @metrics.propagate
+    def timed(stage):
+        start = time.perf_counter()
+        with metrics.span(stage.name):
+            value = stage.func(**{dep: results[dep] for dep in stage.deps})
+        return value, time.perf_counter() - start
+
+    with ThreadPoolExecutor(max_workers=max_workers or max(len(pending), 1)) as executor:
+        running = {}
+        while pending or running:
+            for name, stage in list(pending.items()):
+                if all(dep in results for dep in stage.deps):
+                    running[executor.submit(timed, stage)] = name
+                    del pending[name]
+
+            if not running:
+                raise ValueError(f"Stages have circular dependencies: {', '.join(pending)}")
+
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                name = running.pop(future)
+                try:
+                    results[name], timings[name] = future.result()
+                except Exception:
+                    for other in running:
+                        other.cancel()
+                    raise
+                if verbose:
+                    print(f"[{name}] done in {timings[name]:.2f}s")
+
+    return results, timings
+
+
+def downstream(stages, names):
+    """
+    The named stages and every stage that needs them, directly or through other stages.
+
+    These are the results to drop when the named stages' inputs change.
+    """
+    dependents = {}
+    for stage in stages:
+        for dep in stage.deps:
+            dependents.setdefault(dep, []).append(stage.name)
+
+    found = set()
+    todo = list(names)
+    while todo:
+        name = todo.pop()
+        if name not in found:
+            found.add(name)
+            todo.extend(dependents.get(name, ()))
+    return found
@@ -1,10 +1,39 @@
 import requests
-from bs4 import BeautifulSoup
-import gspread
-from google.oauth2.service_account import Credentials
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from urllib.parse import urlparse
+import threading
+import time
+import sys
 import os
-import json
 
+import metrics
+from history import HistoryStore
+from http_cache import cached_get
+from parsing import DEFAULT_PARSER, xpath_has_class
+from sheets import get_or_create_worksheet, sync_worksheet, write_worksheet
+from transport import get_transport
+
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/119.0.0.0 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8,application/signed-exchange;v=b3;q=0.7',
+    'Accept-Language': 'en-US,en;q=0.9',
+    'Referer': 'https://www.google.com/',  # Simulate coming from a search engine
+    'Connection': 'keep-alive'
+}
+
+# Chart names accepted by the crawler, mapped to their billboard.com URL slugs
+CHARTS = {
+    'hot-100': 'hot-100',
+    'billboard-200': 'billboard-200',
+    'streaming-songs': 'streaming-songs',
+}
+
+def chart_history_url(artist, chart):
+    """Build the chart-history URL for an artist slug (e.g. 'drake') and chart name."""
+    return f'https://www.billboard.com/artist/{artist}/chart-history/{CHARTS[chart]}/'
+
+@metrics.measured()
 def extract_table_data(url):
     """
     Extracts data from the artist chart history table on the given URL.
@@ -16,17 +45,7 @@ def extract_table_data(url):
         A list of dictionaries, where each dictionary represents a row in the table.
     """
     try:
-
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/119.0.0.0 Safari/537.36',
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8,application/signed-exchange;v=b3;q=0.7',
-            'Accept-Language': 'en-US,en;q=0.9',
-            'Referer': 'https://www.google.com/',  # Simulate coming from a search engine
-            'Connection': 'keep-alive'
-        }
-    
-        url = 'https://www.billboard.com/artist/drake/chart-history/hot-100/'
-        response = requests.get(url, headers=headers)
+        response = cached_get(url, headers=HEADERS)
     
         if response.status_code == 200:
             print("Request successful!")
@@ -34,7 +53,39 @@ def extract_table_data(url):
         else:
             print(f"Request failed with status code: {response.status_code}")
 
-        soup = BeautifulSoup(response.content, 'html.parser')
+        return parse_chart_history(response.content)
+
+    except requests.exceptions.RequestException as e:
+        print(f"Error during request: {e}")
+        return []
+    except Exception as e:
+        print(f"An error occurred: {e}")
+        return []
+
+def parse_chart_history(html_content, parser=None):
+    """
+    Parses the artist chart history table out of a Billboard page.
+
+    Args:
+        html_content: The raw HTML of the chart history page.
+        parser: 'lxml' for the single-pass lxml parser, 'bs4' for BeautifulSoup.
+            Defaults to lxml.
+
+    Returns:
+        A list of dictionaries, where each dictionary represents a row in the table.
+    """
+    parser = parser or DEFAULT_PARSER
+    if parser == 'lxml':
+        return _parse_chart_history_lxml(html_content)
+    if parser == 'bs4':
+        return _parse_chart_history_bs4(html_content)
+    raise ValueError(f"Unknown parser '{parser}'. Expected 'lxml' or 'bs4'.")
+
+def _parse_chart_history_bs4(html_content):
+    from bs4 import BeautifulSoup
+
+    try:
+        soup = BeautifulSoup(html_content, 'html.parser')
 
         # Find the table container
         table_container = soup.select_one('.artist-chart-history-container .artist-chart-history-items')
@@ -99,14 +150,174 @@ def extract_table_data(url):
 
         return table_data
 
-    except requests.exceptions.RequestException as e:
-        print(f"Error during request: {e}")
+    except Exception as e:
+        print(f"An error occurred: {e}")
         return []
+
+# The lxml parser mirrors the CSS selectors used by _parse_chart_history_bs4
+_CONTAINER_XPATH = (
+    f"(//*[{xpath_has_class('artist-chart-history-container')}]"
+    f"//*[{xpath_has_class('artist-chart-history-items')}])[1]"
+)
+_ROWS_XPATH = f".//div[{xpath_has_class('o-chart-results-list-row')}]"
+
+# Span class -> (field, index of the data cell it has to sit in)
+_CELL_SPANS = {
+    'artist-chart-row-debut-date': ('debut_date', 1),
+    'artist-chart-row-peak-pos': ('peak_pos', 2),
+    'artist-chart-row-peak-week': ('peak_week', 2),
+    'artist-chart-row-peak-date': ('peak_date', 3),
+    'artist-chart-row-week-on-chart': ('weeks_on_chart', 4),
+}
+
+def _parse_chart_row_lxml(row):
+    """Collect every field of one chart row in a single walk over its elements."""
+    from lxml import etree
+
+    found = {}
+    cell_count = 0
+    open_cells = []  # indexes of the data cells enclosing the current element
+
+    for event, element in etree.iterwalk(row, events=('start', 'end')):
+        tag = element.tag
+        if not isinstance(tag, str):
+            continue
+        classes = (element.get('class') or '').split()
+        is_cell = tag == 'div' and 'o-chart-results-list__item' in classes
+
+        if event == 'end':
+            if is_cell:
+                open_cells.pop()
+            continue
+
+        if is_cell:
+            open_cells.append(cell_count)
+            cell_count += 1
+        elif tag == 'h3':
+            if 'title' not in found and element.get('id') == 'title-of-a-story' and 'c-title' in classes:
+                found['title'] = element
+        elif tag == 'span':
+            for name in classes:
+                if name == 'c-label':
+                    found.setdefault('artist', element)
+                elif name in _CELL_SPANS:
+                    field, cell_index = _CELL_SPANS[name]
+                    if field not in found and cell_index in open_cells:
+                        found[field] = element
+
+    if cell_count < 5:
+        return None
+
+    def text(field):
+        element = found.get(field)
+        return element.text_content().strip() if element is not None else ''
+
+    peak_position = text('peak_pos')
+    peak_week = text('peak_week')
+    return {
+        'title': text('title'),
+        'artist': text('artist'),
+        'debut_date': text('debut_date'),
+        'peak_position': f"{peak_position}\n\n{peak_week}" if peak_position or peak_week else '',
+        'peak_date': text('peak_date'),
+        'weeks_on_chart': text('weeks_on_chart'),
+    }
+
+def _parse_chart_history_lxml(html_content):
+    import lxml.html
+    from bs4 import UnicodeDammit
+
+    try:
+        if isinstance(html_content, bytes):
+            # Decode the same way BeautifulSoup does so both parsers see identical text
+            html_content = UnicodeDammit(html_content, is_html=True).unicode_markup or ''
+
+        if not html_content.strip():
+            print("Table container not found.")
+            return []
+
+        document = lxml.html.document_fromstring(html_content)
+
+        table_container = document.xpath(_CONTAINER_XPATH)
+        if not table_container:
+            print("Table container not found.")
+            return []
+
+        rows = table_container[0].xpath(_ROWS_XPATH)
+        if not rows:
+            print("No rows found in the table.")
+            return []
+
+        table_data = []
+        for row in rows:
+            row_data = _parse_chart_row_lxml(row)
+            if row_data is None:
+                row_data = {}
+                print(f"Warning: Not enough data cells found in row: {row_data.get('title', 'Unknown Title')}")
+            table_data.append(row_data)
+
+        return table_data
+
     except Exception as e:
         print(f"An error occurred: {e}")
         return []
 
-def output_to_google_sheets(data, spreadsheet_id, sheet_name):
+class HostThrottle:
+    """
+    Limits how hard the crawler hits each host: at most `per_host` requests in
+    flight at once, and at least `delay` seconds between request starts.
+    """
+
+    def __init__(self, per_host=2, delay=1.0):
+        self.per_host = per_host
+        self.delay = delay
+        self._lock = threading.Lock()
+        self._semaphores = {}
+        self._next_start = {}
+
+    @contextmanager
+    def slot(self, url):
+        host = urlparse(url).netloc
+        with self._lock:
+            semaphore = self._semaphores.setdefault(host, threading.Semaphore(self.per_host))
+
+        with semaphore:
+            # Reserve the next start time for this host, then sleep until it arrives
+            with self._lock:
+                now = time.monotonic()
+                start = max(now, self._next_start.get(host, now))
+                self._next_start[host] = start + self.delay
+            time.sleep(start - now)
+            yield
+
+def crawl_chart_histories(targets, max_workers=8, per_host=2, delay=1.0):
+    """
+    Fetches the chart history for many (artist, chart) targets concurrently.
+
+    Args:
+        targets: An iterable of (artist, chart) tuples, e.g. ('drake', 'hot-100').
+        max_workers: Size of the worker pool.
+        per_host: Maximum concurrent requests to any single host.
+        delay: Minimum seconds between request starts on the same host.
+
+    Returns:
+        A dictionary mapping each (artist, chart) target to its list of rows.
+        Targets that fail come back as an empty list.
+    """
+    targets = list(dict.fromkeys(targets))
+    throttle = HostThrottle(per_host=per_host, delay=delay)
+
+    def crawl_one(target):
+        url = chart_history_url(*target)
+        with throttle.slot(url):
+            return extract_table_data(url)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        results = executor.map(metrics.propagate(crawl_one), targets)
+        return dict(zip(targets, results))
+
+@metrics.measured()
+def output_to_google_sheets(data, spreadsheet_id, sheet_name, sync=True):
     """
     Outputs the extracted data to a Google Sheet.
 
@@ -114,33 +325,15 @@ def output_to_google_sheets(data, spreadsheet_id, sheet_name):
         data: The list of dictionaries containing the table data.
         spreadsheet_id: The ID of the Google Sheet.
         sheet_name: The name of the sheet within the spreadsheet.
+        sync: Only write the cells that changed, matching rows by title.
+            If False, every row is rewritten.
     """
-    # Define the scope of the API
-    scopes = [
-        "https://www.googleapis.com/auth/spreadsheets",
-        "https://www.googleapis.com/auth/drive.file",
-        "https://www.googleapis.com/auth/drive"
-    ]
-
-    # Access the Google service account key
-    google_service_account_key_json = os.environ.get("GOOGLE_SERVICE_ACCOUNT_KEY")
-    if google_service_account_key_json:
-        google_service_account_key = json.loads(google_service_account_key_json)
-    else:
+    # Open the spreadsheet with the shared, process-wide client
+    try:
+        sheet = get_or_create_worksheet(spreadsheet_id, sheet_name, rows=100, cols=20)
+    except FileNotFoundError:
         print("GOOGLE_SERVICE_ACCOUNT_KEY not found.")
         exit()
-
-    creds = Credentials.from_service_account_info(google_service_account_key, scopes=scopes)
-
-    # Authenticate with Google Sheets API
-    client = gspread.authorize(creds)
-
-    # Open the spreadsheet
-    try:
-        sheet = client.open_by_key(spreadsheet_id).worksheet(sheet_name)
-    except gspread.exceptions.WorksheetNotFound:
-        print(f"Sheet '{sheet_name}' not found. Creating a new sheet.")
-        sheet = client.open_by_key(spreadsheet_id).add_worksheet(title=sheet_name, rows="100", cols="20")
     except Exception as e:
         print(f"An error occurred while opening the spreadsheet: {e}")
         return
@@ -161,22 +354,69 @@ def output_to_google_sheets(data, spreadsheet_id, sheet_name):
 
     # Update the sheet with the data
     try:
-        sheet.update(output_data)
+        if sync:
+            sync_worksheet(sheet, output_data, key_column='title')
+        else:
+            write_worksheet(sheet, output_data)
         print(f"Data successfully written to sheet '{sheet_name}'.")
     except Exception as e:
         print(f"An error occurred while writing to the sheet: {e}")
 
-# Example usage:
-url = 'https://www.billboard.com/artist/drake/chart-history/hot-100/'  # Replace with the actual URL of the page
-spreadsheet_id = os.environ.get("GOOGLE_SPREADSHEET_ID")
-if not spreadsheet_id:
-    print("GOOGLE_SPREADSHEET_ID not found.")
-    exit()
-sheet_name = 'Sheet1'  # Replace with the desired sheet name
+def parse_targets(args):
+    """Turn 'artist:chart' command-line arguments into (artist, chart) tuples."""
+    targets = []
+    for arg in args:
+        artist, _, chart = arg.partition(':')
+        chart = chart or 'hot-100'
+        if chart not in CHARTS:
+            raise ValueError(f"Unknown chart '{chart}'. Expected one of: {', '.join(CHARTS)}")
+        targets.append((artist, chart))
+    return targets
+
+@metrics.measured('charts')
+def main(targets=None, dry_run=False):
+    """
+    Scrape chart history and write it to Google Sheets.
+
+    Args:
+        targets: 'artist:chart' strings to crawl, one tab per target. Without
+            targets, Drake's Hot 100 history is written to 'Sheet1'.
+        dry_run: Print what was scraped instead of writing to Google Sheets.
+    """
+    spreadsheet_id = os.environ.get("GOOGLE_SPREADSHEET_ID")
+    if not spreadsheet_id and not dry_run:
+        print("GOOGLE_SPREADSHEET_ID not found.")
+        exit()
+
+    if targets:
+        # Crawl mode: python scraper.py drake:hot-100 taylor-swift:billboard-200 ...
+        # Each target gets its own tab, named after the artist and chart.
+        results = crawl_chart_histories(parse_targets(targets))
+        sheet_names = {target: f"{target[0]} {target[1]}" for target in results}
+    else:
+        # Example usage:
+        target = ('drake', 'hot-100')
+        results = {target: extract_table_data(chart_history_url(*target))}
+        sheet_names = {target: 'Sheet1'}  # Replace with the desired sheet name
+
+    history = None if dry_run else HistoryStore.from_env()
+
+    for target, table_data in results.items():
+        sheet_name = sheet_names[target]
+        if not table_data:
+            print(f"No data extracted for {sheet_name}.")
+        elif dry_run:
+            print(f"{sheet_name}: {len(table_data)} rows")
+            for row in table_data:
+                print(f"  {row.get('title', '')} - {row.get('artist', '')}")
+        else:
+            output_to_google_sheets(table_data, spreadsheet_id, sheet_name)
+            # Keep a local snapshot so chart runs can be compared over time; songs are
+            # keyed by title and artist, since different songs can share a title
+            history.record_snapshot(f"charts/{target[0]}/{target[1]}", table_data, name_field='title',
+                                    key_fields=['title', 'artist'])
 
-table_data = extract_table_data(url)
+    print(get_transport().summary())
 
-if table_data:
-    output_to_google_sheets(table_data, spreadsheet_id, sheet_name)
-else:
-    print("No data extracted.")
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,361 @@
+"""
+Google Sheets helpers shared by scraper.py and fbb/pitchers.py.
+
+One authorized gspread client is built per process and reused for every call,
+so the service account token and the underlying HTTP session are shared by
+all reads and writes. gspread and google-auth are imported on first use.
+
+Every API call and every cell written is counted in metrics.
+"""
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from difflib import SequenceMatcher
+
+import metrics
+
+SCOPES = [
+    'https://www.googleapis.com/auth/spreadsheets',
+    'https://www.googleapis.com/auth/drive',
+]
+
+# Environment variables that may hold the service account key JSON, in order
+CREDENTIAL_ENV_VARS = ('SECRET_GOOGLE_SERVICE_ACCOUNT_KEY', 'GOOGLE_SERVICE_ACCOUNT_KEY')
+
+_client = None
+_spreadsheets = {}
+_lock = threading.Lock()
+
+
+def _service_account_info():
+    for name in CREDENTIAL_ENV_VARS:
+        if os.environ.get(name):
+            return json.loads(os.environ[name])
+
+    # Fall back to a local key file
+    path = os.environ.get('GOOGLE_SERVICE_ACCOUNT_FILE', 'credentials.json')
+    if not os.path.exists(path):
+        raise FileNotFoundError("Google Sheets credentials not found")
+    with open(path) as f:
+        return json.load(f)
+
+
+def get_client():
+    """Return the process-wide authorized gspread client, creating it on first use."""
+    global _client
+    with _lock:
+        if _client is None:
+            import gspread
+            from google.oauth2.service_account import Credentials
+
+            creds = Credentials.from_service_account_info(_service_account_info(), scopes=SCOPES)
+            _client = gspread.authorize(creds)
+        return _client
+
+
+def open_spreadsheet(spreadsheet_id):
+    """Open a spreadsheet once per process; later calls reuse the same object."""
+    client = get_client()
+    with _lock:
+        if spreadsheet_id not in _spreadsheets:
+            metrics.count('sheets_calls')
+            _spreadsheets[spreadsheet_id] = client.open_by_key(spreadsheet_id)
+        return _spreadsheets[spreadsheet_id]
+
+
+def revision(spreadsheet_id):
+    """
+    When the spreadsheet was last modified, from its Drive metadata.
+
+    One small Drive API call, without reading any cells: the value changes
+    whenever any cell of any worksheet does.
+    """
+    spreadsheet = open_spreadsheet(spreadsheet_id)
+    metrics.count('sheets_calls')
+    return spreadsheet.get_lastUpdateTime()
+
+
+def read_ranges(spreadsheet_id, ranges):
+    """
+    Read several ranges of one spreadsheet in a single values_batch_get call.
+
+    Args:
+        spreadsheet_id: The spreadsheet to read.
+        ranges: A1 ranges or bare worksheet titles, e.g. ['ranks June 3', 'Sheet2!A:F'].
+
+    Returns:
+        One list of rows per range, padded to a rectangle like get_all_values().
+        A range that cannot be read (e.g. its worksheet does not exist yet) comes
+        back as None.
+    """
+    from gspread.exceptions import APIError
+    from gspread.utils import absolute_range_name, fill_gaps
+
+    def a1(range_name):
+        title, _, cells = range_name.partition('!')
+        return absolute_range_name(title.strip("'"), cells or None)
+
+    spreadsheet = open_spreadsheet(spreadsheet_id)
+    try:
+        metrics.count('sheets_calls')
+        response = spreadsheet.values_batch_get([a1(range_name) for range_name in ranges])
+        value_ranges = [value_range.get('values', []) for value_range in response['valueRanges']]
+    except APIError:
+        if len(ranges) == 1:
+            return [None]
+        # One bad range fails the whole batch; read the rest one by one
+        return [read_ranges(spreadsheet_id, [range_name])[0] for range_name in ranges]
+
+    return [fill_gaps(values) if values else [] for values in value_ranges]
+
+
+def read_many(requests):
+    """
+    Read (spreadsheet_id, range) pairs with one batch call per spreadsheet.
+
+    Calls for different spreadsheets run at the same time.
+
+    Returns:
+        The values for each request, in the same order (see read_ranges).
+    """
+    by_spreadsheet = {}
+    for spreadsheet_id, range_name in requests:
+        by_spreadsheet.setdefault(spreadsheet_id, []).append(range_name)
+
+    with ThreadPoolExecutor(max_workers=max(len(by_spreadsheet), 1)) as executor:
+        futures = {
+            spreadsheet_id: executor.submit(metrics.propagate(read_ranges), spreadsheet_id, ranges)
+            for spreadsheet_id, ranges in by_spreadsheet.items()
+        }
+        values = {
+            spreadsheet_id: dict(zip(by_spreadsheet[spreadsheet_id], future.result()))
+            for spreadsheet_id, future in futures.items()
+        }
+    return [values[spreadsheet_id][range_name] for spreadsheet_id, range_name in requests]
+
+
+def read_frame(spreadsheet_id, sheet_name, columns, numeric=(), header=None):
+    """
+    Load only the named columns of a worksheet into a typed DataFrame.
+
+    The header row is read first (unless given), then just the needed columns
+    are fetched in one values_batch_get, column-major, and numeric columns
+    are converted a whole column at a time.
+
+    Args:
+        spreadsheet_id: The spreadsheet to read.
+        sheet_name: The worksheet title.
+        columns: Header names to load. With duplicate headers the first one is used.
+        numeric: Columns to convert to numbers (unparseable cells become NaN).
+        header: The worksheet's header row, if already read.
+
+    Returns:
+        A DataFrame with one column per name in `columns`, in that order.
+    """
+    import pandas as pd
+    from gspread.utils import absolute_range_name, rowcol_to_a1
+
+    spreadsheet = open_spreadsheet(spreadsheet_id)
+    if header is None:
+        metrics.count('sheets_calls')
+        response = spreadsheet.values_batch_get([absolute_range_name(sheet_name, '1:1')])
+        header = (response['valueRanges'][0].get('values') or [[]])[0]
+
+    positions = {}
+    for position, name in enumerate(header, 1):
+        positions.setdefault(name, position)
+    missing = [name for name in columns if name not in positions]
+    if missing:
+        raise ValueError(f"Columns not found in '{sheet_name}': {', '.join(missing)}")
+
+    letters = [rowcol_to_a1(1, positions[name])[:-1] for name in columns]
+    metrics.count('sheets_calls')
+    response = spreadsheet.values_batch_get(
+        [absolute_range_name(sheet_name, f"{letter}2:{letter}") for letter in letters],
+        params={'majorDimension': 'COLUMNS'},
+    )
+    values = [(value_range.get('values') or [[]])[0] for value_range in response['valueRanges']]
+
+    # Trailing empty cells are left out of each column; pad them back
+    length = max((len(column) for column in values), default=0)
+    frame = pd.DataFrame({
+        name: column + [''] * (length - len(column)) for name, column in zip(columns, values)
+    })
+    for name in numeric:
+        frame[name] = pd.to_numeric(frame[name], errors='coerce')
+    return frame
+
+
+def get_or_create_worksheet(spreadsheet_id, sheet_name, rows=1000, cols=26):
+    """Return the named worksheet, adding it to the spreadsheet if it does not exist."""
+    from gspread.exceptions import WorksheetNotFound
+
+    spreadsheet = open_spreadsheet(spreadsheet_id)
+    try:
+        metrics.count('sheets_calls')
+        return spreadsheet.worksheet(sheet_name)
+    except WorksheetNotFound:
+        print(f"Sheet '{sheet_name}' not found. Creating a new sheet.")
+        metrics.count('sheets_calls')
+        return spreadsheet.add_worksheet(title=sheet_name, rows=rows, cols=cols)
+
+
+_HEADER = object()  # sort key of the header row, so it only ever lines up with itself
+
+
+def _row_keys(grid, key_column):
+    if not grid:
+        return []
+    header = grid[0]
+    key_index = header.index(key_column) if key_column in header else None
+    keys = [_HEADER]
+    for position, row in enumerate(grid[1:]):
+        if key_index is None:
+            keys.append(('row', position))
+        else:
+            keys.append(row[key_index] if key_index < len(row) else '')
+    return keys
+
+
+def _cell(value):
+    # An empty dict clears the cell instead of writing an empty string into it
+    return {'userEnteredValue': {'stringValue': value}} if value != '' else {}
+
+
+def _update_row(sheet_id, row_index, old_row, new_row, requests):
+    """Queue updateCells requests for the runs of cells that differ between two rows."""
+    width = max(len(old_row), len(new_row))
+    old_row = list(old_row) + [''] * (width - len(old_row))
+    new_row = list(new_row) + [''] * (width - len(new_row))
+
+    written = 0
+    column = 0
+    while column < width:
+        if old_row[column] == new_row[column]:
+            column += 1
+            continue
+        start = column
+        while column < width and old_row[column] != new_row[column]:
+            column += 1
+        requests.append({'updateCells': {
+            'range': {
+                'sheetId': sheet_id,
+                'startRowIndex': row_index, 'endRowIndex': row_index + 1,
+                'startColumnIndex': start, 'endColumnIndex': column,
+            },
+            'rows': [{'values': [_cell(value) for value in new_row[start:column]]}],
+            'fields': 'userEnteredValue',
+        }})
+        written += column - start
+    return written
+
+
+def _insert_rows(sheet_id, row_index, rows, requests):
+    requests.append({'insertDimension': {
+        'range': {'sheetId': sheet_id, 'dimension': 'ROWS', 'startIndex': row_index, 'endIndex': row_index + len(rows)},
+        'inheritFromBefore': row_index > 0,
+    }})
+    return sum(_update_row(sheet_id, row_index + offset, [], row, requests) for offset, row in enumerate(rows))
+
+
+def _delete_rows(sheet_id, start, end, requests):
+    requests.append({'deleteDimension': {
+        'range': {'sheetId': sheet_id, 'dimension': 'ROWS', 'startIndex': start, 'endIndex': end},
+    }})
+
+
+def diff_requests(sheet_id, current, target, key_column):
+    """
+    Work out the batch_update requests that turn the `current` grid into `target`.
+
+    Rows are matched by their value in `key_column` so that a song or pitcher
+    that moved up or down only costs a row insert/delete, not a rewrite of
+    every row below it. Matched rows are compared cell by cell and only the
+    cells that changed are written.
+
+    Args:
+        sheet_id: The worksheet's numeric sheetId.
+        current: The sheet's current values, header row first.
+        target: The values the sheet should end up with, header row first.
+        key_column: Header of the column that identifies a row, e.g. 'Player'.
+
+    Returns:
+        (requests, stats) where stats counts cells written and rows inserted/deleted.
+    """
+    matcher = SequenceMatcher(None, _row_keys(current, key_column), _row_keys(target, key_column), autojunk=False)
+    requests = []
+    stats = {'cells_written': 0, 'rows_inserted': 0, 'rows_deleted': 0}
+
+    # Walk the edits bottom-up so the row indexes of edits above stay valid
+    for tag, i1, i2, j1, j2 in reversed(matcher.get_opcodes()):
+        overlap = min(i2 - i1, j2 - j1) if tag != 'equal' else i2 - i1
+        if tag in ('delete', 'replace') and i2 - i1 > overlap:
+            _delete_rows(sheet_id, i1 + overlap, i2, requests)
+            stats['rows_deleted'] += i2 - i1 - overlap
+        if tag in ('insert', 'replace') and j2 - j1 > overlap:
+            stats['cells_written'] += _insert_rows(sheet_id, i1 + overlap, target[j1 + overlap:j2], requests)
+            stats['rows_inserted'] += j2 - j1 - overlap
+        for offset in reversed(range(overlap)):
+            stats['cells_written'] += _update_row(sheet_id, i1 + offset, current[i1 + offset], target[j1 + offset], requests)
+
+    return requests, stats
+
+
+def sync_worksheet(worksheet, target, key_column, current=None):
+    """
+    Incrementally update a worksheet so it holds `target`, without clearing it.
+
+    Reads the sheet once, diffs it against `target` by `key_column`, and sends
+    every change (cell updates, row inserts and deletes) in one batch_update.
+
+    Args:
+        worksheet: A gspread Worksheet.
+        target: List of rows (lists of strings), header row first.
+        key_column: Header of the column that identifies a row.
+        current: The sheet's values if they were already read (e.g. with
+            read_many); saves the read.
+
+    Returns:
+        A dict with the number of cells written, rows inserted/deleted and API requests sent.
+    """
+    if current is None:
+        metrics.count('sheets_calls')
+        current = worksheet.get_all_values()
+    requests, stats = diff_requests(worksheet.id, current, target, key_column)
+
+    width = max((len(row) for row in target), default=0)
+    if width > worksheet.col_count:
+        metrics.count('sheets_calls')
+        worksheet.add_cols(width - worksheet.col_count)
+
+    if requests:
+        metrics.count('sheets_calls')
+        worksheet.spreadsheet.batch_update({'requests': requests})
+    stats['requests'] = len(requests)
+    metrics.count('cells_written', stats['cells_written'])
+
+    print(f"Synced '{worksheet.title}': {stats['cells_written']} cells written, "
+          f"{stats['rows_inserted']} rows inserted, {stats['rows_deleted']} rows deleted")
+    return stats
+
+
+def write_worksheet(worksheet, values, clear=False, value_input_option=None):
+    """
+    Overwrite a worksheet from A1 with `values`, without diffing.
+
+    Args:
+        worksheet: A gspread Worksheet.
+        values: List of rows, header row first.
+        clear: Clear the whole sheet first, so no old rows are left below the new ones.
+        value_input_option: Passed to Worksheet.update, e.g. 'RAW'.
+    """
+    if clear:
+        metrics.count('sheets_calls')
+        worksheet.clear()
+    metrics.count('sheets_calls')
+    if value_input_option:
+        worksheet.update(values, value_input_option=value_input_option)
+    else:
+        worksheet.update(values)
+    metrics.count('cells_written', sum(len(row) for row in values))
@@ -0,0 +1,157 @@
+"""
+Shared HTTP transport for every scraped source.
+
+One requests.Session per process with a connection pool per host, default
+timeouts, exponential backoff with jitter on 429/5xx responses and connection
+errors, per-host token-bucket rate limits, and request/byte counters.
+"""
+import random
+import threading
+import time
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import metrics
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+# Sustained requests per second allowed to each host (hosts not listed are unlimited)
+DEFAULT_RATES = {
+    'www.billboard.com': 1.0,
+    'pitcherlist.com': 2.0,
+    'www.teamrankings.com': 1.0,
+    'www.fangraphs.com': 1.0,
+    'lm-api-reads.fantasy.espn.com': 2.0,
+}
+
+
+class TokenBucket:
+    """Allows `rate` requests per second on average, with bursts of up to `burst`."""
+
+    def __init__(self, rate, burst=1):
+        self.rate = rate
+        self.capacity = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def take(self):
+        """Block until a token is available, then consume it."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class Transport:
+    def __init__(self, timeout=(5, 30), max_retries=4, backoff=0.5, max_backoff=30, rates=None, burst=2,
+                 pool_size=10):
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.rates = dict(DEFAULT_RATES if rates is None else rates)
+        self.burst = burst
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+        self._lock = threading.Lock()
+        self._buckets = {}
+        self._stats = {}
+
+    def _bucket(self, host):
+        rate = self.rates.get(host)
+        if not rate:
+            return None
+        with self._lock:
+            if host not in self._buckets:
+                self._buckets[host] = TokenBucket(rate, self.burst)
+            return self._buckets[host]
+
+    def _count(self, host, field, amount=1):
+        with self._lock:
+            counters = self._stats.setdefault(host, {'requests': 0, 'bytes': 0, 'retries': 0, 'errors': 0})
+            counters[field] += amount
+
+    def _delay(self, attempt, response=None):
+        # Honour a numeric Retry-After, otherwise back off exponentially with full jitter
+        retry_after = response.headers.get('Retry-After') if response is not None else None
+        if retry_after and retry_after.isdigit():
+            return min(float(retry_after), self.max_backoff)
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+
+    def get(self, url, **kwargs):
+        """
+        GET a URL with rate limiting and retries.
+
+        Keyword arguments are passed to requests.Session.get; `timeout`
+        defaults to the transport's timeout.
+
+        Returns:
+            The final requests.Response. A response that is still 429/5xx after
+            all retries is returned as is (callers use raise_for_status()).
+
+        Raises:
+            requests.exceptions.RequestException if the connection keeps failing.
+        """
+        host = urlparse(url).netloc
+        kwargs.setdefault('timeout', self.timeout)
+        bucket = self._bucket(host)
+
+        for attempt in range(self.max_retries + 1):
+            if bucket:
+                bucket.take()
+            self._count(host, 'requests')
+            metrics.count('http_requests')
+            try:
+                response = self.session.get(url, **kwargs)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+                self._count(host, 'errors')
+                if attempt == self.max_retries:
+                    raise
+                self._count(host, 'retries')
+                time.sleep(self._delay(attempt))
+                continue
+
+            self._count(host, 'bytes', len(response.content))
+            metrics.count('http_bytes', len(response.content))
+            if response.status_code not in RETRY_STATUSES or attempt == self.max_retries:
+                return response
+            self._count(host, 'retries')
+            time.sleep(self._delay(attempt, response))
+
+    def stats(self):
+        """Per-host counters: requests sent (including retries), bytes received, retries and errors."""
+        with self._lock:
+            return {host: dict(counters) for host, counters in self._stats.items()}
+
+    def summary(self):
+        stats = self.stats()
+        requests_sent = sum(counters['requests'] for counters in stats.values())
+        kilobytes = sum(counters['bytes'] for counters in stats.values()) / 1024
+        retries = sum(counters['retries'] for counters in stats.values())
+        return f"HTTP: {requests_sent} requests, {kilobytes:.0f} KB, {retries} retries"
+
+
+_transport = None
+_transport_lock = threading.Lock()
+
+
+def get_transport():
+    """Return the process-wide transport."""
+    global _transport
+    with _transport_lock:
+        if _transport is None:
+            _transport = Transport()
+        return _transport
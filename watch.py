@@ -0,0 +1,152 @@
+"""
+Change-driven re-runs of a stage pipeline (see pipeline.py).
+
+Instead of redoing every stage at fixed times, watch() polls cheap signals,
+such as a post listing's `modified` time, an HTTP validator or a spreadsheet's
+revision. When a signal changes, only the stages downstream of that source run
+again. Every other stage's result is kept from the previous run.
+
+A Signal names the stages that read its source:
+
+    Signal('pitcherlist', latest_revision, stages=('rankings',))
+    Signal('opponents', opponent_revision, stages=('opponent_ranks',), every=3600)
+
+The tokens seen by the last successful run are saved to WATCH_STATE (default
+.watch_state.json). A watcher restarted when nothing has changed upstream then
+does no work until something does.
+
+    WATCH_INTERVAL   seconds between polls (default 300)
+"""
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import metrics
+from pipeline import downstream, run_stages
+
+DEFAULT_INTERVAL = 300
+
+
+class Signal:
+    """
+    A cheap check of one source.
+
+    `check` returns a string that changes whenever the source does, and
+    `stages` are the stages that read the source. Set `every` to poll a slow
+    source less often than the watch interval.
+    """
+
+    def __init__(self, name, check, stages, every=None):
+        self.name = name
+        self.check = check
+        self.stages = tuple(stages)
+        self.every = every
+
+    def __repr__(self):
+        return f"Signal({self.name!r}, stages={self.stages!r})"
+
+
+def state_path():
+    return os.environ.get('WATCH_STATE', '.watch_state.json')
+
+
+def load_state(key, path=None):
+    """The signal tokens saved under `key`, or {} if there are none."""
+    try:
+        with open(path or state_path()) as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return state.get('tokens', {}) if state.get('key') == key else {}
+
+
+def save_state(key, tokens, path=None):
+    path = path or state_path()
+    temp_path = f"{path}.tmp"
+    with open(temp_path, 'w') as f:
+        json.dump({'key': key, 'tokens': tokens}, f, indent=2, sort_keys=True)
+    os.replace(temp_path, path)
+
+
+def poll(signals, tokens):
+    """
+    Check the signals at the same time.
+
+    A signal that cannot be checked is reported and counts as unchanged, so a
+    flaky source does not trigger runs.
+
+    Returns:
+        {signal name: new token} for the signals whose token differs from `tokens`.
+    """
+    def check(signal):
+        try:
+            with metrics.span('signal', signal=signal.name):
+                return signal.check()
+        except Exception as e:
+            print(f"[watch] could not check {signal.name}: {type(e).__name__}: {e}")
+            return None
+
+    with ThreadPoolExecutor(max_workers=len(signals) or 1) as executor:
+        checked = dict(zip([signal.name for signal in signals],
+                           executor.map(metrics.propagate(check), signals)))
+    return {name: token for name, token in checked.items()
+            if token is not None and token != tokens.get(name)}
+
+
+def watch(stages, signals, interval=None, always=(), duration=None, key=None, run=run_stages):
+    """
+    Run the stages whenever a signal changes, re-running only what the change affects.
+
+    Args:
+        stages: The pipeline's Stage objects.
+        signals: Signals for the pipeline's sources.
+        interval: Seconds between polls (WATCH_INTERVAL, default 300).
+        always: Stages re-run with every run, e.g. reads of the tabs a run
+            writes to, so each export compares against what is there now.
+        duration: Stop after this many seconds (default: run until interrupted).
+        key: Identifies the configuration the saved tokens belong to. Tokens
+            saved under another key are ignored.
+        run: Called as run(stages, results=...) to run the stages, like run_stages.
+
+    Returns:
+        The results of the last run, keyed by stage name.
+    """
+    stages = list(stages)
+    interval = float(os.environ.get('WATCH_INTERVAL', DEFAULT_INTERVAL)) if interval is None else interval
+    deadline = None if duration is None else time.monotonic() + duration
+    tokens = load_state(key)
+    # Tokens of changes no run has succeeded on yet: their stages stay stale until one does
+    pending = {}
+    results = {}
+    checked_at = {}
+
+    while True:
+        started = time.monotonic()
+        due = [signal for signal in signals
+               if signal.every is None or started - checked_at.get(signal.name, -signal.every) >= signal.every]
+        checked_at.update((signal.name, started) for signal in due)
+        pending.update(poll(due, {**tokens, **pending}))
+
+        if pending:
+            # Nothing is kept before the first run, so it runs everything
+            names = [name for signal in signals if signal.name in pending for name in signal.stages]
+            stale = downstream(stages, [*names, *always]) if results else {stage.name for stage in stages}
+            print(f"[watch] {', '.join(sorted(pending))} changed: running {len(stale)} of {len(stages)} stages")
+            kept = {name: value for name, value in results.items() if name not in stale}
+            try:
+                with metrics.span('watch', changed=sorted(pending)):
+                    results, _ = run(stages, results=kept)
+            except Exception as e:
+                # The changes stay pending, so their stages run again after the next poll,
+                # even if their signals are not due by then
+                print(f"[watch] run failed, retrying on the next poll: {type(e).__name__}: {e}")
+                results = kept
+            else:
+                tokens.update(pending)
+                pending = {}
+                save_state(key, tokens)
+
+        if deadline is not None and time.monotonic() + interval > deadline:
+            return results
+        time.sleep(max(0.0, interval - (time.monotonic() - started)))